@@ -0,0 +1,174 @@
+"""Stand-in Ollama server and image server for benchmarks.
+
+Serves /api/version, /api/generate and /api/chat, streaming NDJSON at a
+configurable token rate after a configurable time to first token, and
+/images/<width>x<height>.jpg with generated JPEG images. /bench/stats
+returns counters of what the server has seen.
+
+Run directly to use it outside the benchmark driver:
+
+    python benchmarks/fake_ollama.py --port 11434 --token-rate 50
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+
+from aiohttp import web
+
+NANOSECONDS = 1_000_000_000
+
+
+def make_image(width, height) -> bytes:
+    """
+    Generate a JPEG of the given size. Noise compresses badly, so this is a
+    worst case for upload size. Without Pillow random bytes of a typical
+    JPEG size are returned instead.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return os.urandom(width * height // 8)
+    image = Image.merge("RGB", [Image.effect_noise((width, height), 48) for _ in range(3)])
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+class FakeOllama:
+    """Request handlers and counters of the fake server."""
+
+    def __init__(self, tokens, token_rate, ttfb, load_duration):
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.ttfb = ttfb
+        self.load_duration = load_duration
+        self.images = {}
+        self.stats = {
+            "generate_requests": 0,
+            "chat_requests": 0,
+            "preload_requests": 0,
+            "image_requests": 0,
+            "bytes_received": 0,
+            "bytes_sent": 0,
+            "disconnected": 0,
+        }
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_get("/api/version", self.handle_version)
+        app.router.add_post("/api/generate", self.handle_generate)
+        app.router.add_post("/api/chat", self.handle_chat)
+        app.router.add_get("/images/{width:\\d+}x{height:\\d+}.jpg", self.handle_image)
+        app.router.add_get("/bench/stats", self.handle_stats)
+        return app
+
+    async def handle_version(self, request):
+        return web.json_response({"version": "0.0.0-bench"})
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def handle_image(self, request):
+        size = (int(request.match_info["width"]), int(request.match_info["height"]))
+        if size not in self.images:
+            self.images[size] = await asyncio.get_running_loop().run_in_executor(
+                None, make_image, *size
+            )
+        self.stats["image_requests"] += 1
+        self.stats["bytes_sent"] += len(self.images[size])
+        return web.Response(body=self.images[size], content_type="image/jpeg")
+
+    async def handle_generate(self, request):
+        return await self._async_respond(request, chat=False)
+
+    async def handle_chat(self, request):
+        return await self._async_respond(request, chat=True)
+
+    async def _async_respond(self, request, chat):
+        body = await request.read()
+        self.stats["bytes_received"] += len(body)
+        payload = json.loads(body)
+        model = payload.get("model", "bench")
+
+        # Preload requests carry no prompt and do not stream
+        if payload.get("stream") is False:
+            self.stats["preload_requests"] += 1
+            return web.json_response({"model": model, "response": "", "done": True})
+        self.stats["chat_requests" if chat else "generate_requests"] += 1
+
+        started = time.monotonic()
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        try:
+            await asyncio.sleep(self.ttfb)
+            prompt_done = time.monotonic()
+            interval = 1 / self.token_rate if self.token_rate > 0 else 0
+            for index in range(self.tokens):
+                token = f"word{index} "
+                chunk = {"model": model, "done": False}
+                if chat:
+                    chunk["message"] = {"role": "assistant", "content": token}
+                else:
+                    chunk["response"] = token
+                await response.write(json.dumps(chunk).encode() + b"\n")
+                if interval:
+                    await asyncio.sleep(interval)
+
+            finished = time.monotonic()
+            final = {
+                "model": model,
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": int((finished - started + self.load_duration) * NANOSECONDS),
+                "load_duration": int(self.load_duration * NANOSECONDS),
+                "prompt_eval_count": len(body) // 4,
+                "prompt_eval_duration": int((prompt_done - started) * NANOSECONDS),
+                "eval_count": self.tokens,
+                "eval_duration": int((finished - prompt_done) * NANOSECONDS),
+            }
+            if chat:
+                final["message"] = {"role": "assistant", "content": ""}
+            else:
+                final["response"] = ""
+            await response.write(json.dumps(final).encode() + b"\n")
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            # The client gave up, for example after a timeout or output limit
+            self.stats["disconnected"] += 1
+            raise
+        return response
+
+
+def add_arguments(parser):
+    """Add the fake server options to an argument parser."""
+    parser.add_argument("--tokens", type=int, default=60, help="tokens per response (default: 60)")
+    parser.add_argument(
+        "--token-rate", type=float, default=200,
+        help="tokens generated per second, 0 for as fast as possible (default: 200)",
+    )
+    parser.add_argument(
+        "--ttfb", type=float, default=0.05,
+        help="seconds before the first token, standing in for prompt evaluation (default: 0.05)",
+    )
+    parser.add_argument(
+        "--load-duration", type=float, default=0.0,
+        help="model load time reported to the client, in seconds (default: 0)",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeOllama(args.tokens, args.token_rate, args.ttfb, args.load_duration)
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""Benchmark Ollama Vision against a local stand-in Ollama server.
+
+Starts benchmarks/fake_ollama.py in a subprocess and drives either the
+OllamaClient directly ("client" mode, no Home Assistant needed) or the
+analyze_image service of a throwaway Home Assistant instance ("pipeline"
+mode, needs the homeassistant package). Reports requests per second,
+per-stage latency percentiles, event loop blocking and peak memory.
+
+    python benchmarks/run.py --mode client --requests 200 --concurrency 8
+    python benchmarks/run.py --mode pipeline --text --image-size 2560x1440 --json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+import aiohttp
+
+import fake_ollama
+
+INTEGRATION_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "ollama_vision"
+
+# Interval of the event loop lag probe, in seconds
+LAG_PROBE_INTERVAL = 0.005
+
+
+def load_integration_module(name):
+    """
+    Import a module of the integration without running its package
+    __init__, which needs Home Assistant. Works for the modules that only
+    depend on aiohttp (api, endpoints, cache, metrics, const).
+    """
+    if "ollama_vision" not in sys.modules:
+        package = types.ModuleType("ollama_vision")
+        package.__path__ = [str(INTEGRATION_DIR)]
+        sys.modules["ollama_vision"] = package
+    return importlib.import_module(f"ollama_vision.{name}")
+
+
+class LoopLagMonitor:
+    """
+    Measure how long the event loop is blocked by sleeping for a short
+    interval over and over and recording how late each wake-up is.
+    """
+
+    def __init__(self, interval=LAG_PROBE_INTERVAL):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._async_probe())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _async_probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+
+    def report(self, percentile) -> dict:
+        lags = sorted(self.lags)
+        return {
+            "max_lag_ms": round(lags[-1] * 1000, 2) if lags else None,
+            "p99_lag_ms": round(percentile(lags, 0.99) * 1000, 2) if lags else None,
+            # Lag beyond one probe interval means a callback hogged the loop
+            "blocked_ms": round(sum(lag for lag in lags if lag > self.interval) * 1000, 1),
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def async_start_server(args):
+    """Start the fake Ollama server and wait until it answers."""
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, str(Path(fake_ollama.__file__)),
+        "--port", str(port),
+        "--tokens", str(args.tokens),
+        "--token-rate", str(args.token_rate),
+        "--ttfb", str(args.ttfb),
+        "--load-duration", str(args.load_duration),
+    ])
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/api/version") as resp:
+                    if resp.status == 200:
+                        return process, port
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Fake Ollama server did not start")
+
+
+async def async_server_stats(port) -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://127.0.0.1:{port}/bench/stats") as resp:
+            return await resp.json()
+
+
+async def async_run_workers(requests, concurrency, run_one, monitor):
+    """
+    Run run_one(index) requests times with at most concurrency at once.
+    Only this run is timed and watched by the loop lag monitor, not the
+    setup and teardown around it. Return the failures and elapsed seconds.
+    """
+    counter = iter(range(requests))
+    failures = []
+
+    async def worker(worker_id):
+        for index in counter:
+            try:
+                await run_one(worker_id, index)
+            except Exception as exc:  # pylint: disable=broad-except
+                failures.append(repr(exc))
+
+    monitor.start()
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    finally:
+        elapsed = time.monotonic() - started
+        await monitor.stop()
+    return failures, elapsed
+
+
+async def async_bench_client(args, port, image_url, monitor):
+    """Drive OllamaClient directly: fetch, describe and optionally elaborate."""
+    api = load_integration_module("api")
+    const = load_integration_module("const")
+
+    session = api.create_session(max(4, args.concurrency), 10, 300)
+    client = api.OllamaClient(
+        "127.0.0.1", port, "bench-vision",
+        "127.0.0.1" if args.text else None, port if args.text else None,
+        "bench-text" if args.text else None,
+        session=session,
+        max_image_bytes=100 * 1024 * 1024,
+    )
+    samples = []
+
+    async def run_one(worker_id, index):
+        timings = {}
+        started = time.monotonic()
+        image_data = await client.fetch_image(image_url)
+        if image_data is None:
+            raise RuntimeError("image download failed")
+        now = time.monotonic()
+        timings["image_load"] = now - started
+
+        stage_start = now
+        description = await client.describe_image(image_data, const.DEFAULT_PROMPT, stats={})
+        if description is None:
+            raise RuntimeError("vision request failed")
+        now = time.monotonic()
+        timings["vision"] = now - stage_start
+
+        if args.text:
+            stage_start = now
+            await client.elaborate_text(
+                description, const.DEFAULT_TEXT_PROMPT.format(description=description), stats={}
+            )
+            now = time.monotonic()
+            timings["text"] = now - stage_start
+
+        timings["total"] = now - started
+        samples.append(timings)
+
+    try:
+        failures, elapsed = await async_run_workers(args.requests, args.concurrency, run_one, monitor)
+    finally:
+        await client.async_close()
+    return samples, failures, elapsed
+
+
+async def async_bench_pipeline(args, port, image_url, monitor):
+    """
+    Drive the analyze_image service of a throwaway Home Assistant instance
+    with the integration set up against the fake server.
+    """
+    from homeassistant import bootstrap, runner
+
+    config_dir = tempfile.mkdtemp(prefix="ollama_vision_bench_")
+    os.makedirs(os.path.join(config_dir, "custom_components"))
+    os.symlink(INTEGRATION_DIR, os.path.join(config_dir, "custom_components", "ollama_vision"))
+    with open(os.path.join(config_dir, "configuration.yaml"), "w", encoding="utf-8") as file:
+        file.write("homeassistant:\n  name: Benchmark\n")
+
+    hass = await bootstrap.async_setup_hass(
+        runner.RuntimeConfig(config_dir=config_dir, skip_pip=True)
+    )
+    if hass is None:
+        raise RuntimeError("Home Assistant could not be set up")
+    try:
+        await hass.async_start()
+
+        # Create the entry through the config flow, like a user would
+        result = await hass.config_entries.flow.async_init(
+            "ollama_vision", context={"source": "user"}
+        )
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {
+            "name": "bench",
+            "host": "127.0.0.1",
+            "port": port,
+            "model": "bench-vision",
+            "vision_keepalive": -1,
+            "text_model_enabled": args.text,
+        })
+        if args.text:
+            result = await hass.config_entries.flow.async_configure(result["flow_id"], {
+                "text_host": "127.0.0.1",
+                "text_port": port,
+                "text_model": "bench-text",
+                "text_keepalive": -1,
+            })
+        entry = result["result"]
+        hass.config_entries.async_update_entry(entry, options={
+            "max_in_flight": args.max_in_flight,
+            "max_queue": max(10, args.concurrency),
+            "cache_ttl": 0,
+            "max_image_dimension": args.max_image_dimension,
+        })
+        await hass.async_block_till_done()
+
+        samples = []
+
+        async def run_one(worker_id, index):
+            response = await hass.services.async_call(
+                "ollama_vision", "analyze_image",
+                {
+                    "image_url": image_url,
+                    # One image name per worker, so requests neither coalesce nor replace each other
+                    "image_name": f"bench_{worker_id}",
+                    "use_text_model": args.text,
+                    "stream": args.stream,
+                },
+                blocking=True,
+                return_response=True,
+            )
+            samples.append(response["timings"])
+
+        failures, elapsed = await async_run_workers(args.requests, args.concurrency, run_one, monitor)
+        return samples, failures, elapsed
+    finally:
+        await hass.async_stop()
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+
+def stage_report(samples, percentile) -> dict:
+    values = {}
+    for sample in samples:
+        for stage, duration in sample.items():
+            values.setdefault(stage, []).append(duration)
+    report = {}
+    for stage, durations in values.items():
+        durations.sort()
+        report[stage] = {
+            name: round(percentile(durations, fraction) * 1000, 1)
+            for name, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99))
+        }
+    return report
+
+
+def print_report(report):
+    print(
+        f"{report['mode']}: {report['completed']} requests, {report['failed']} failed "
+        f"in {report['elapsed_s']} s = {report['requests_per_s']} requests/s"
+    )
+    print(f"{'stage':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, values in report["stages"].items():
+        print(f"{stage:<24}{values['p50_ms']:>10}{values['p95_ms']:>10}{values['p99_ms']:>10}")
+    loop = report["event_loop"]
+    print(
+        f"event loop: max lag {loop['max_lag_ms']} ms, p99 lag {loop['p99_lag_ms']} ms, "
+        f"blocked {loop['blocked_ms']} ms in total"
+    )
+    memory = report["memory"]
+    line = f"memory: peak RSS {memory['peak_rss_mb']} MB"
+    if memory.get("python_peak_mb") is not None:
+        line += f", peak Python allocations {memory['python_peak_mb']} MB"
+    print(line)
+    server = report["server"]
+    print(
+        f"server: {server['generate_requests']} generate, {server['chat_requests']} chat, "
+        f"{round(server['bytes_received'] / 1024 / 1024, 1)} MB received, "
+        f"{server['disconnected']} disconnected"
+    )
+    for failure in report["failures"][:5]:
+        print(f"failure: {failure}")
+
+
+async def async_main(args):
+    percentile = load_integration_module("metrics").percentile
+    process, port = await async_start_server(args)
+    try:
+        width, height = args.image_size.lower().split("x")
+        image_url = f"http://127.0.0.1:{port}/images/{int(width)}x{int(height)}.jpg"
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        # Home Assistant startup and shutdown in pipeline mode are left out
+        monitor = LoopLagMonitor()
+        if args.mode == "client":
+            samples, failures, elapsed = await async_bench_client(args, port, image_url, monitor)
+        else:
+            samples, failures, elapsed = await async_bench_pipeline(args, port, image_url, monitor)
+
+        python_peak = None
+        if args.tracemalloc:
+            python_peak = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+            tracemalloc.stop()
+
+        return {
+            "mode": args.mode,
+            "completed": len(samples),
+            "failed": len(failures),
+            "elapsed_s": round(elapsed, 2),
+            "requests_per_s": round(len(samples) / elapsed, 2) if elapsed else None,
+            "stages": stage_report(samples, percentile),
+            "event_loop": monitor.report(percentile),
+            "memory": {
+                # ru_maxrss is in kilobytes on Linux
+                "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "python_peak_mb": python_peak,
+            },
+            "server": await async_server_stats(port),
+            "failures": failures,
+            "arguments": vars(args),
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("client", "pipeline"), default="client")
+    parser.add_argument("--requests", type=int, default=100, help="number of analyses (default: 100)")
+    parser.add_argument("--concurrency", type=int, default=4, help="analyses submitted at once (default: 4)")
+    parser.add_argument("--image-size", default="1920x1080", help="image width x height (default: 1920x1080)")
+    parser.add_argument("--text", action="store_true", help="elaborate descriptions with a text model")
+    parser.add_argument("--stream", action="store_true", help="pipeline mode: stream partial results")
+    parser.add_argument(
+        "--max-in-flight", type=int, default=2,
+        help="pipeline mode: Max Concurrent Analyses option (default: 2)",
+    )
+    parser.add_argument(
+        "--max-image-dimension", type=int, default=0,
+        help="pipeline mode: Max Image Dimension option (default: 0)",
+    )
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python allocations (slower)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    fake_ollama.add_arguments(parser)
+    args = parser.parse_args()
+
+    report = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
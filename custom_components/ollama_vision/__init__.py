@@ -1,16 +1,28 @@
 """The Ollama Vision integration."""
+import asyncio
+import json
 import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import partial
+
 import voluptuous as vol
 import aiohttp
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers import config_validation as cv
-from homeassistant.exceptions import HomeAssistantError
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError, TemplateError
 from homeassistant.const import CONF_NAME, Platform
 import homeassistant.helpers.entity_registry as er
 from homeassistant.helpers.device_registry import async_get as async_get_device_registry
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.template import Template, result_as_boolean
+from homeassistant.util import dt as dt_util
+from homeassistant.components.camera import async_get_image as async_get_camera_image
 
 from .const import (
     DOMAIN,
@@ -21,8 +33,27 @@ from .const import (
     ATTR_PROMPT,
     ATTR_IMAGE_NAME,
     ATTR_DEVICE_ID,
+    ATTR_IMAGE_PATH,
+    ATTR_CAMERA_ENTITY,
     SERVICE_ANALYZE_IMAGE,
+    SERVICE_PRELOAD_MODELS,
+    SERVICE_ANALYZE_IMAGES,
+    EVENT_BATCH_ANALYZED,
+    ATTR_IMAGES,
+    ATTR_COMBINE,
+    SERVICE_PURGE_IMAGE_SENSORS,
+    ATTR_MAX_AGE,
+    SERVICE_GET_HISTORY,
+    ATTR_LIMIT,
+    SERVICE_RESET_CHAT,
     EVENT_IMAGE_ANALYZED,
+    EVENT_PARTIAL,
+    SIGNAL_IMAGE_SENSOR_UPDATED,
+    ATTR_STREAM,
+    ATTR_TIMEOUT,
+    ATTR_FORMAT,
+    ATTR_SKIP_TEXT_MODEL_IF,
+    ATTR_CROPS,
     ATTR_USE_TEXT_MODEL,
     ATTR_TEXT_PROMPT,
     CONF_TEXT_MODEL_ENABLED,
@@ -36,32 +67,193 @@ from .const import (
     CONF_VISION_KEEPALIVE,
     DEFAULT_PROMPT,
     DEFAULT_TEXT_PROMPT,
+    CONF_MAX_CONNECTIONS,
+    CONF_CONNECT_TIMEOUT,
+    CONF_REQUEST_TIMEOUT,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MAX_QUEUE,
+    CONF_TEXT_MAX_IN_FLIGHT,
+    DEFAULT_TEXT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_QUEUE,
+    CONF_CACHE_TTL,
+    CONF_CACHE_MAX_ENTRIES,
+    CONF_CACHE_MAX_BYTES,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CACHE_MAX_ENTRIES,
+    DEFAULT_CACHE_MAX_BYTES,
+    CONF_SCENE_THRESHOLD,
+    DEFAULT_SCENE_THRESHOLD,
+    CONF_MAX_IMAGE_DIMENSION,
+    CONF_JPEG_QUALITY,
+    CONF_CROP_REGIONS,
+    CONF_COMBINE_CROPS,
+    DEFAULT_MAX_IMAGE_DIMENSION,
+    DEFAULT_JPEG_QUALITY,
+    DEFAULT_CROP_REGIONS,
+    DEFAULT_COMBINE_CROPS,
+    CONF_MAX_IMAGE_SIZE,
+    DEFAULT_MAX_IMAGE_SIZE,
+    CONF_MAX_OUTPUT_CHARS,
+    CONF_STOP_SEQUENCES,
+    DEFAULT_MAX_OUTPUT_CHARS,
+    DEFAULT_STOP_SEQUENCES,
+    CONF_WARMUP_ON_SETUP,
+    CONF_KEEP_WARM_INTERVAL,
+    CONF_KEEP_WARM_HOURS,
+    DEFAULT_WARMUP_ON_SETUP,
+    DEFAULT_KEEP_WARM_INTERVAL,
+    DEFAULT_KEEP_WARM_HOURS,
+    CONF_MAX_IMAGE_SENSORS,
+    CONF_IMAGE_SENSOR_TTL,
+    DEFAULT_MAX_IMAGE_SENSORS,
+    DEFAULT_IMAGE_SENSOR_TTL,
+    CONF_INCLUDE_PROMPTS,
+    CONF_HISTORY_SIZE,
+    DEFAULT_INCLUDE_PROMPTS,
+    DEFAULT_HISTORY_SIZE,
+    CONF_DIAGNOSTICS,
+    CONF_PROFILE_REQUESTS,
+    DEFAULT_DIAGNOSTICS,
+    DEFAULT_PROFILE_REQUESTS,
+    CONF_CHAT_MODE,
+    CONF_CHAT_HISTORY,
+    CONF_CHAT_RESET,
+    DEFAULT_CHAT_MODE,
+    DEFAULT_CHAT_HISTORY,
+    DEFAULT_CHAT_RESET,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
     __version__,
     INTEGRATION_NAME,
     MANUFACTURER,
 )
-from .api import OllamaClient
+from .api import OllamaClient, create_session, parse_stop_sequences
+from .cache import ResultCache
+from .metrics import PipelineMetrics, ollama_timings, merge_ollama_stats, NANOSECONDS
+from .imaging import (
+    perceptual_hash,
+    hamming_distance,
+    parse_crop_box,
+    parse_crop_regions,
+    prepare_image,
+    read_image_file,
+)
+from .scheduler import AnalysisScheduler, AnalysisDropped
+from .registry import ImageSensorRegistry
+from .history import ResultHistory, async_remove_history, prompt_hash
+from .profiler import PipelineProfiler
+from .chat import ChatSessions, text_system_prompt
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR]
 
-# Service schema
-ANALYZE_IMAGE_SCHEMA = vol.Schema(
+HEALTH_CHECK_INTERVAL = timedelta(seconds=30)
+
+SENSOR_EXPIRY_INTERVAL = timedelta(minutes=10)
+
+# Structured output: "json" or a JSON schema the description must follow
+RESPONSE_FORMAT = vol.Any("json", dict)
+
+
+def _crop_box(value):
+    """Validate a crop box given as a list or a "left,top,right,bottom" string."""
+    if not isinstance(value, str):
+        value = ",".join(str(part) for part in cv.ensure_list(value))
+    try:
+        return parse_crop_box(value)
+    except ValueError as exc:
+        raise vol.Invalid(f"Invalid crop box {value}: {exc}") from exc
+
+
+CROP_BOXES = vol.All(cv.ensure_list, [_crop_box])
+
+# Service schema; exactly one image source must be given
+ANALYZE_IMAGE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(ATTR_IMAGE_URL, "image_source"): cv.string,
+            vol.Exclusive(ATTR_IMAGE_PATH, "image_source"): cv.string,
+            vol.Exclusive(ATTR_CAMERA_ENTITY, "image_source"): cv.entity_domain("camera"),
+            vol.Optional(ATTR_PROMPT, default=DEFAULT_PROMPT): cv.string,
+            vol.Required(ATTR_IMAGE_NAME): cv.string,
+            vol.Optional(ATTR_DEVICE_ID): cv.string,
+            vol.Optional(ATTR_USE_TEXT_MODEL, default=False): cv.boolean,
+            vol.Optional(ATTR_TEXT_PROMPT, default=DEFAULT_TEXT_PROMPT): cv.string,
+            vol.Optional(ATTR_STREAM, default=False): cv.boolean,
+            vol.Optional(ATTR_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=1)),
+            vol.Optional(ATTR_FORMAT): RESPONSE_FORMAT,
+            vol.Optional(ATTR_SKIP_TEXT_MODEL_IF): cv.string,
+            vol.Optional(ATTR_CROPS): CROP_BOXES,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_IMAGE_URL, ATTR_IMAGE_PATH, ATTR_CAMERA_ENTITY),
+)
+
+# One image of an analyze_images call; exactly one image source must be given
+BATCH_IMAGE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(ATTR_IMAGE_URL, "image_source"): cv.string,
+            vol.Exclusive(ATTR_IMAGE_PATH, "image_source"): cv.string,
+            vol.Exclusive(ATTR_CAMERA_ENTITY, "image_source"): cv.entity_domain("camera"),
+            vol.Required(ATTR_IMAGE_NAME): cv.string,
+            vol.Optional(ATTR_PROMPT): cv.string,
+            vol.Optional(ATTR_CROPS): CROP_BOXES,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_IMAGE_URL, ATTR_IMAGE_PATH, ATTR_CAMERA_ENTITY),
+)
+
+ANALYZE_IMAGES_SCHEMA = vol.Schema(
     {
-        vol.Required(ATTR_IMAGE_URL): cv.string,
+        vol.Required(ATTR_IMAGES): vol.All(cv.ensure_list, [BATCH_IMAGE_SCHEMA], vol.Length(min=1)),
         vol.Optional(ATTR_PROMPT, default=DEFAULT_PROMPT): cv.string,
-        vol.Required(ATTR_IMAGE_NAME): cv.string,
+        vol.Optional(ATTR_COMBINE, default=False): cv.boolean,
+        vol.Optional(ATTR_IMAGE_NAME): cv.string,
         vol.Optional(ATTR_DEVICE_ID): cv.string,
         vol.Optional(ATTR_USE_TEXT_MODEL, default=False): cv.boolean,
         vol.Optional(ATTR_TEXT_PROMPT, default=DEFAULT_TEXT_PROMPT): cv.string,
+        vol.Optional(ATTR_STREAM, default=False): cv.boolean,
+        vol.Optional(ATTR_FORMAT): RESPONSE_FORMAT,
+        vol.Optional(ATTR_SKIP_TEXT_MODEL_IF): cv.string,
+    }
+)
+
+PRELOAD_MODELS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_USE_TEXT_MODEL, default=True): cv.boolean,
+    }
+)
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_IMAGE_NAME): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_LIMIT): cv.positive_int,
+    }
+)
+
+PURGE_IMAGE_SENSORS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_MAX_AGE, default=0): cv.positive_int,
+    }
+)
+
+RESET_CHAT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_IMAGE_NAME): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
     }
 )
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Ollama Vision component."""
     hass.data[DOMAIN] = {}
-    hass.data[DOMAIN]["pending_sensors"] = {}
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -88,12 +280,87 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         text_model = entry.data.get(CONF_TEXT_MODEL) or entry.options.get(CONF_TEXT_MODEL, DEFAULT_TEXT_MODEL)
         text_keepalive = entry.data.get(CONF_TEXT_KEEPALIVE) or entry.options.get(CONF_TEXT_KEEPALIVE, DEFAULT_KEEPALIVE)
     
-    client = OllamaClient(host, port, model, text_host, text_port, text_model, vision_keepalive, text_keepalive)
+    # Recent results per image name, persisted in .storage
+    history = ResultHistory(
+        hass,
+        entry.entry_id,
+        entry.options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE),
+        entry.options.get(CONF_MAX_IMAGE_SENSORS, DEFAULT_MAX_IMAGE_SENSORS),
+    )
+    await history.async_load()
+
+    # Connection pool shared by all requests of this entry; created once the
+    # history has loaded, so a failed load does not leave it open
+    session = create_session(
+        entry.options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS),
+        entry.options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+        entry.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+    )
+
+    # Vision and text results keyed on a hash of their inputs
+    cache = ResultCache(
+        entry.options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+        entry.options.get(CONF_CACHE_MAX_ENTRIES, DEFAULT_CACHE_MAX_ENTRIES),
+        entry.options.get(CONF_CACHE_MAX_BYTES, DEFAULT_CACHE_MAX_BYTES),
+    )
+
+    # Opt-in event loop diagnostics, exported through the diagnostics download
+    profiler = PipelineProfiler(
+        entry.options.get(CONF_DIAGNOSTICS, DEFAULT_DIAGNOSTICS),
+        entry.options.get(CONF_PROFILE_REQUESTS, DEFAULT_PROFILE_REQUESTS),
+    )
+
+    client = OllamaClient(
+        host, port, model, text_host, text_port, text_model, vision_keepalive, text_keepalive,
+        session=session,
+        cache=cache,
+        max_image_bytes=entry.options.get(CONF_MAX_IMAGE_SIZE, DEFAULT_MAX_IMAGE_SIZE) * 1024 * 1024,
+        max_output_chars=entry.options.get(CONF_MAX_OUTPUT_CHARS, DEFAULT_MAX_OUTPUT_CHARS),
+        stop_sequences=parse_stop_sequences(
+            entry.options.get(CONF_STOP_SEQUENCES, DEFAULT_STOP_SEQUENCES)
+        ),
+        profiler=profiler,
+    )
     
+    scheduler = AnalysisScheduler(
+        hass,
+        entry.options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT),
+        entry.options.get(CONF_MAX_QUEUE, DEFAULT_MAX_QUEUE),
+    )
+
     # Store the client in hass.data
     hass.data[DOMAIN][entry.entry_id] = {
         "client": client,
+        "scheduler": scheduler,
+        "in_flight": {},
+        # Background work cancelled before the connection pool closes on unload
+        "tasks": set(),
+        # Last scene per image name, as many as image sensors, least recently used dropped first
+        "scenes": OrderedDict(),
+        "metrics": PipelineMetrics(),
+        "profiler": profiler,
+        # Bounds the vision requests, several of which run for one analysis of several crops
+        "vision_semaphore": asyncio.Semaphore(
+            entry.options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT)
+        ),
+        "text_semaphore": asyncio.Semaphore(
+            entry.options.get(CONF_TEXT_MAX_IN_FLIGHT, DEFAULT_TEXT_MAX_IN_FLIGHT)
+        ),
         "sensors": {},
+        "history": history,
+        "image_sensors": ImageSensorRegistry(
+            hass,
+            entry.entry_id,
+            entry.options.get(CONF_MAX_IMAGE_SENSORS, DEFAULT_MAX_IMAGE_SENSORS),
+            entry.options.get(CONF_IMAGE_SENSOR_TTL, DEFAULT_IMAGE_SENSOR_TTL) * 3600,
+        ),
+        # Conversations per image name when talking to Ollama's /api/chat
+        "chats": ChatSessions(
+            entry.options.get(CONF_CHAT_MODE, DEFAULT_CHAT_MODE),
+            entry.options.get(CONF_CHAT_HISTORY, DEFAULT_CHAT_HISTORY),
+            entry.options.get(CONF_CHAT_RESET, DEFAULT_CHAT_RESET) * 60,
+            entry.options.get(CONF_MAX_IMAGE_SENSORS, DEFAULT_MAX_IMAGE_SENSORS),
+        ),
         "config": {
             CONF_HOST: host,
             CONF_PORT: port,
@@ -103,7 +370,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             CONF_TEXT_HOST: text_host,
             CONF_TEXT_PORT: text_port,
             CONF_TEXT_MODEL: text_model,
-            CONF_TEXT_KEEPALIVE: text_keepalive
+            CONF_TEXT_KEEPALIVE: text_keepalive,
+            CONF_SCENE_THRESHOLD: entry.options.get(CONF_SCENE_THRESHOLD, DEFAULT_SCENE_THRESHOLD),
+            CONF_MAX_IMAGE_DIMENSION: entry.options.get(CONF_MAX_IMAGE_DIMENSION, DEFAULT_MAX_IMAGE_DIMENSION),
+            CONF_JPEG_QUALITY: entry.options.get(CONF_JPEG_QUALITY, DEFAULT_JPEG_QUALITY),
+            CONF_INCLUDE_PROMPTS: entry.options.get(CONF_INCLUDE_PROMPTS, DEFAULT_INCLUDE_PROMPTS),
+            CONF_CROP_REGIONS: parse_crop_regions(entry.options.get(CONF_CROP_REGIONS, DEFAULT_CROP_REGIONS)),
+            CONF_COMBINE_CROPS: entry.options.get(CONF_COMBINE_CROPS, DEFAULT_COMBINE_CROPS),
         },
         "device_info": {
             "identifiers": {(DOMAIN, entry.entry_id)},
@@ -116,11 +389,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     # Rest of the function remains the same
 
-    # Create service handler wrapper
-    @callback
-    def async_handle_service(call):
+    # Create service handler wrapper; without a requested response the
+    # analysis runs in the background and the call returns right away
+    async def async_handle_service(call):
         """Handle the service call."""
+        if call.return_response:
+            return await handle_analyze_image(hass, call)
         hass.async_create_task(handle_analyze_image(hass, call))
+        return None
     
     # Register service with the wrapper
     hass.services.async_register(
@@ -128,8 +404,86 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         SERVICE_ANALYZE_IMAGE,
         async_handle_service,
         schema=ANALYZE_IMAGE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    @callback
+    def async_handle_batch_service(call):
+        """Handle the batch service call."""
+        # Every image is a queued analysis unless combined; more than the
+        # queue holds would drop the first ones before they ever ran
+        if not call.data.get(ATTR_COMBINE, False):
+            entry_id_to_use = _resolve_entry_id(hass, call.data.get(ATTR_DEVICE_ID))
+            max_queue = hass.data[DOMAIN][entry_id_to_use]["scheduler"].max_queue
+            if len(call.data[ATTR_IMAGES]) > max_queue:
+                raise HomeAssistantError(
+                    f"A batch of {len(call.data[ATTR_IMAGES])} images exceeds Max Queued "
+                    f"Analyses ({max_queue}); split it or set combine"
+                )
+        hass.async_create_task(handle_analyze_images(hass, call))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ANALYZE_IMAGES,
+        async_handle_batch_service,
+        schema=ANALYZE_IMAGES_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PRELOAD_MODELS,
+        partial(handle_preload_models, hass),
+        schema=PRELOAD_MODELS_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        partial(handle_get_history, hass),
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PURGE_IMAGE_SENSORS,
+        partial(handle_purge_image_sensors, hass),
+        schema=PURGE_IMAGE_SENSORS_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESET_CHAT,
+        partial(handle_reset_chat, hass),
+        schema=RESET_CHAT_SCHEMA,
     )
 
+    # Load the models now so the first analysis does not pay the load time
+    if entry.options.get(CONF_WARMUP_ON_SETUP, DEFAULT_WARMUP_ON_SETUP):
+        _async_create_entry_task(hass, entry.entry_id, client.async_preload())
+
+    # Keep the models loaded during the configured hours
+    keep_warm_interval = entry.options.get(CONF_KEEP_WARM_INTERVAL, DEFAULT_KEEP_WARM_INTERVAL)
+    if keep_warm_interval > 0:
+        keep_warm_hours = entry.options.get(CONF_KEEP_WARM_HOURS, DEFAULT_KEEP_WARM_HOURS)
+
+        @callback
+        def _async_keep_warm(now):
+            if _within_hours(keep_warm_hours, dt_util.as_local(now).time()):
+                _async_create_entry_task(hass, entry.entry_id, client.async_preload())
+
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, _async_keep_warm, timedelta(minutes=keep_warm_interval)
+            )
+        )
+
+    if profiler.enabled:
+        profiler.async_start(hass.loop)
+        entry.async_on_unload(profiler.async_stop)
+
+    # Remove image sensors that have not been updated for a long time
+    image_sensors = hass.data[DOMAIN][entry.entry_id]["image_sensors"]
+    if image_sensors.idle_ttl > 0:
+        entry.async_on_unload(
+            async_track_time_interval(hass, image_sensors.async_expire, SENSOR_EXPIRY_INTERVAL)
+        )
+
     # Check if the text model is enabled and remove the sensor if it exists and the model is disabled
     if not text_model_enabled:
         ent_registry = er.async_get(hass)
@@ -142,6 +496,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             # Remove it, so it disappears from Home Assistant entirely
             ent_registry.async_remove(text_sensor_entity_id)
 
+    # Health check Ollama servers when requests are balanced over several
+    if len(client.vision_pool.endpoints) > 1 or (
+        client.text_pool is not None and len(client.text_pool.endpoints) > 1
+    ):
+        @callback
+        def _async_check_health(now=None):
+            _async_create_entry_task(hass, entry.entry_id, client.async_check_health())
+
+        entry.async_on_unload(
+            async_track_time_interval(hass, _async_check_health, HEALTH_CHECK_INTERVAL)
+        )
+
     # Create update listener
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     
@@ -156,16 +522,85 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> Non
     await hass.config_entries.async_reload(entry.entry_id)
 
 
-# Define the analyze_image service outside of async_setup_entry
-async def handle_analyze_image(hass, call):
-    """Handle the analyze_image service call."""
-    image_url = call.data.get(ATTR_IMAGE_URL)
-    vision_prompt = call.data.get(ATTR_PROMPT, DEFAULT_PROMPT)
-    image_name = call.data.get(ATTR_IMAGE_NAME)
+def _within_hours(hours, now) -> bool:
+    """
+    Whether the time now falls in hours, given as "HH:MM-HH:MM". The window
+    may wrap past midnight; an empty or invalid window means always.
+    """
+    start, _, end = (hours or "").partition("-")
+    start = dt_util.parse_time(start.strip())
+    end = dt_util.parse_time(end.strip())
+    if start is None or end is None:
+        return True
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+async def handle_preload_models(hass, call):
+    """Handle the preload_models service call."""
     device_id = call.data.get(ATTR_DEVICE_ID)
-    use_text_model = call.data.get(ATTR_USE_TEXT_MODEL, False)
-    text_prompt = call.data.get(ATTR_TEXT_PROMPT, DEFAULT_TEXT_PROMPT)
-    
+    text = call.data.get(ATTR_USE_TEXT_MODEL, True)
+
+    if device_id:
+        entry_ids = [_resolve_entry_id(hass, device_id)]
+    else:
+        entry_ids = [
+            k for k, v in hass.data[DOMAIN].items()
+            if isinstance(v, dict) and "client" in v
+        ]
+
+    results = await asyncio.gather(
+        *(hass.data[DOMAIN][entry_id]["client"].async_preload(text) for entry_id in entry_ids)
+    )
+    if not all(results):
+        raise HomeAssistantError("Failed to preload one or more models")
+
+
+async def handle_get_history(hass, call):
+    """Return the recorded results of an image name, newest first."""
+    image_name = call.data[ATTR_IMAGE_NAME]
+    entry_id_to_use = _resolve_entry_id(hass, call.data.get(ATTR_DEVICE_ID))
+    history = hass.data[DOMAIN][entry_id_to_use]["history"]
+    return {
+        "image_name": image_name,
+        "results": history.get(image_name, call.data.get(ATTR_LIMIT)),
+    }
+
+
+async def handle_purge_image_sensors(hass, call):
+    """
+    Remove the image sensors not updated for max_age hours, plus image
+    sensors left over from earlier runs, of one or all config entries.
+    """
+    device_id = call.data.get(ATTR_DEVICE_ID)
+    max_age = call.data.get(ATTR_MAX_AGE, 0)
+    entry_ids = [_resolve_entry_id(hass, device_id)] if device_id else [
+        k for k, v in hass.data[DOMAIN].items()
+        if isinstance(v, dict) and "client" in v
+    ]
+    for entry_id in entry_ids:
+        image_sensors = hass.data[DOMAIN][entry_id]["image_sensors"]
+        removed = image_sensors.async_purge(max_age * 3600)
+        removed += image_sensors.async_purge_orphans()
+        _LOGGER.info("Removed %d image sensors of %s", removed, entry_id)
+
+
+async def handle_reset_chat(hass, call):
+    """Start new chat sessions for an image name, or all, of one or all config entries."""
+    device_id = call.data.get(ATTR_DEVICE_ID)
+    image_name = call.data.get(ATTR_IMAGE_NAME)
+    entry_ids = [_resolve_entry_id(hass, device_id)] if device_id else [
+        k for k, v in hass.data[DOMAIN].items()
+        if isinstance(v, dict) and "client" in v
+    ]
+    for entry_id in entry_ids:
+        reset = hass.data[DOMAIN][entry_id]["chats"].reset(image_name)
+        _LOGGER.debug("Reset %d chat sessions of %s", reset, entry_id)
+
+
+def _resolve_entry_id(hass, device_id):
+    """Return the config entry to use for a service call targeting device_id."""
     # Determine which integration to use based on device_id
     entry_id_to_use = None
     
@@ -183,7 +618,7 @@ async def handle_analyze_image(hass, call):
                     break
     
     if not entry_id_to_use:
-        # Filter out non-integration keys like "pending_sensors" or "created_sensors"
+        # Filter out any non-integration keys
         valid_entry_ids = [
             k for k, v in hass.data[DOMAIN].items()
             if isinstance(v, dict) and "client" in v
@@ -201,42 +636,847 @@ async def handle_analyze_image(hass, call):
 
         # Pick the first valid entry
         entry_id_to_use = valid_entry_ids[0]
+
+    return entry_id_to_use
+
+
+def _image_source(hass, data):
+    """Return the (source type, source) of the image given in service data."""
+    image_path = data.get(ATTR_IMAGE_PATH)
+    if image_path:
+        if not hass.config.is_allowed_path(image_path):
+            raise HomeAssistantError(
+                f"Cannot read {image_path}, no access to path; "
+                "add it to allowlist_external_dirs"
+            )
+        return (ATTR_IMAGE_PATH, image_path)
+    if data.get(ATTR_CAMERA_ENTITY):
+        return (ATTR_CAMERA_ENTITY, data[ATTR_CAMERA_ENTITY])
+    return (ATTR_IMAGE_URL, data.get(ATTR_IMAGE_URL))
+
+
+# Define the analyze_image service outside of async_setup_entry
+async def handle_analyze_image(hass, call):
+    """
+    Handle the analyze_image service call.
+    Return the analyzed event data, or None if the analysis was dropped or
+    timed out and the caller did not ask for a response.
+    """
+    vision_prompt = call.data.get(ATTR_PROMPT, DEFAULT_PROMPT)
+    image_name = call.data.get(ATTR_IMAGE_NAME)
+    device_id = call.data.get(ATTR_DEVICE_ID)
+    use_text_model = call.data.get(ATTR_USE_TEXT_MODEL, False)
+    text_prompt = call.data.get(ATTR_TEXT_PROMPT, DEFAULT_TEXT_PROMPT)
+    stream = call.data.get(ATTR_STREAM, False)
+    timeout = call.data.get(ATTR_TIMEOUT)
+    response_format = call.data.get(ATTR_FORMAT)
+    skip_text_if = call.data.get(ATTR_SKIP_TEXT_MODEL_IF)
+    crops = call.data.get(ATTR_CROPS)
     
+    entry_id_to_use = _resolve_entry_id(hass, device_id)
+    entry_data = hass.data[DOMAIN][entry_id_to_use]
+    image_source = _image_source(hass, call.data)
+
+    # Identical requests already queued or running share one result
+    in_flight = entry_data["in_flight"]
+    request_key = (
+        image_name, image_source, vision_prompt, use_text_model, text_prompt, stream,
+        json.dumps(response_format, sort_keys=True), skip_text_if, tuple(crops or ()),
+    )
+    shared = in_flight.get(request_key)
+    if shared is None:
+        future = hass.async_create_task(
+            async_process_analysis(
+                hass, entry_id_to_use, image_source, vision_prompt, image_name,
+                use_text_model, text_prompt, stream,
+                response_format=response_format, skip_text_if=skip_text_if, crops=crops,
+            )
+        )
+        _async_track_task(entry_data, future)
+        shared = in_flight[request_key] = {"future": future, "waiters": 0}
+        future.add_done_callback(partial(_async_forget_in_flight, in_flight, request_key))
+    else:
+        _LOGGER.debug("Joining identical in-flight analysis for %s", image_name)
+
+    try:
+        return await _async_wait_shared(shared, timeout)
+    except asyncio.TimeoutError:
+        message = f"Image analysis for {image_name} timed out after {timeout} seconds"
+        if call.return_response:
+            raise HomeAssistantError(message) from None
+        _LOGGER.warning(message)
+    except AnalysisDropped as exc:
+        if call.return_response:
+            raise
+        _LOGGER.warning("Image analysis for %s not performed: %s", image_name, exc)
+    return None
+
+
+async def _async_wait_shared(shared, timeout):
+    """
+    Wait up to timeout seconds for a shared analysis. The analysis, and its
+    Ollama request, is cancelled once every caller waiting for it has given
+    up.
+    """
+    future = shared["future"]
+    shared["waiters"] += 1
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.CancelledError:
+        # Cancelled on unload, not by our caller
+        if future.cancelled() and not asyncio.current_task().cancelling():
+            raise AnalysisDropped("The analysis was cancelled") from None
+        raise
+    finally:
+        shared["waiters"] -= 1
+        if shared["waiters"] == 0 and not future.done():
+            _LOGGER.debug("Nobody is waiting for the analysis any more, cancelling it")
+            future.cancel()
+
+
+async def handle_analyze_images(hass, call):
+    """
+    Handle the analyze_images service call. All images are downloaded at
+    once and then analyzed through the entry's scheduler, either one by one
+    or, with combine, together in a single vision model call. One
+    aggregated event is fired when the whole batch is done.
+    """
+    items = call.data[ATTR_IMAGES]
+    vision_prompt = call.data.get(ATTR_PROMPT, DEFAULT_PROMPT)
+    device_id = call.data.get(ATTR_DEVICE_ID)
+    use_text_model = call.data.get(ATTR_USE_TEXT_MODEL, False)
+    text_prompt = call.data.get(ATTR_TEXT_PROMPT, DEFAULT_TEXT_PROMPT)
+    stream = call.data.get(ATTR_STREAM, False)
+    combine = call.data.get(ATTR_COMBINE, False)
+    response_format = call.data.get(ATTR_FORMAT)
+    skip_text_if = call.data.get(ATTR_SKIP_TEXT_MODEL_IF)
+
+    if combine and not call.data.get(ATTR_IMAGE_NAME):
+        raise HomeAssistantError("image_name is required to combine images")
+
+    entry_id_to_use = _resolve_entry_id(hass, device_id)
     client_to_use = hass.data[DOMAIN][entry_id_to_use]["client"]
-    
+    image_sources = [_image_source(hass, item) for item in items]
+    _async_track_task(hass.data[DOMAIN][entry_id_to_use], asyncio.current_task())
+
+    # Download everything up front; the connection pool bounds the parallelism
+    started = time.monotonic()
+    images = await asyncio.gather(
+        *(async_load_image(hass, client_to_use, source) for source in image_sources)
+    )
+    image_load = time.monotonic() - started
+
+    failed = [
+        {"image_name": item[ATTR_IMAGE_NAME], "error": "Failed to fetch image"}
+        for item, image_data in zip(items, images)
+        if image_data is None
+    ]
+    loaded = [
+        (item, source, image_data)
+        for item, source, image_data in zip(items, image_sources, images)
+        if image_data is not None
+    ]
+
+    if combine:
+        names = [call.data[ATTR_IMAGE_NAME]]
+        jobs = [
+            async_process_combined(
+                hass, entry_id_to_use,
+                [
+                    (item[ATTR_IMAGE_NAME], source, image_data, item.get(ATTR_CROPS))
+                    for item, source, image_data in loaded
+                ],
+                vision_prompt, call.data[ATTR_IMAGE_NAME], use_text_model, text_prompt, stream,
+                response_format, skip_text_if,
+            )
+        ] if loaded else []
+    else:
+        names = [item[ATTR_IMAGE_NAME] for item, _, _ in loaded]
+        jobs = [
+            async_process_analysis(
+                hass, entry_id_to_use, source, item.get(ATTR_PROMPT, vision_prompt),
+                item[ATTR_IMAGE_NAME], use_text_model, text_prompt, stream, image_data,
+                response_format, skip_text_if, item.get(ATTR_CROPS),
+            )
+            for item, source, image_data in loaded
+        ]
+
+    results = []
+    for image_name, outcome in zip(names, await asyncio.gather(*jobs, return_exceptions=True)):
+        if isinstance(outcome, Exception):
+            _LOGGER.warning("Image analysis for %s failed: %s", image_name, outcome)
+            failed.append({"image_name": image_name, "error": str(outcome)})
+        else:
+            results.append(outcome)
+
+    hass.bus.async_fire(EVENT_BATCH_ANALYZED, {
+        "integration_id": entry_id_to_use,
+        "combined": combine,
+        "results": results,
+        "failed": failed,
+        "timings": {
+            "image_load": round(image_load, 3),
+            "total": round(time.monotonic() - started, 3),
+        },
+    })
+
+
+@callback
+def _async_track_task(entry_data, task):
+    """Keep task in the entry's background work until it is done."""
+    entry_data["tasks"].add(task)
+    task.add_done_callback(entry_data["tasks"].discard)
+    return task
+
+
+@callback
+def _async_create_entry_task(hass, entry_id, coro):
+    """
+    Run coro as background work of a config entry, cancelled when the entry
+    unloads. Return the task, or None if the entry is already unloading.
+    """
+    entry_data = hass.data[DOMAIN].get(entry_id)
+    if entry_data is None:
+        coro.close()
+        return None
+    return _async_track_task(entry_data, hass.async_create_task(coro))
+
+
+@callback
+def _async_forget_in_flight(in_flight, request_key, future):
+    """Remove a finished request from the in-flight map."""
+    shared = in_flight.get(request_key)
+    if shared is not None and shared["future"] is future:
+        in_flight.pop(request_key)
+
+
+async def async_load_image(hass, client, image_source):
+    """
+    Load the bytes of an image from a URL, an allowlisted local file or a
+    camera entity. Return None if the image could not be loaded.
+    """
+    source_type, source = image_source
+    if source_type == ATTR_IMAGE_URL:
+        return await client.fetch_image(source)
+
+    try:
+        if source_type == ATTR_IMAGE_PATH:
+            return await hass.async_add_executor_job(
+                read_image_file, source, client.max_image_bytes
+            )
+        image = await async_get_camera_image(hass, source)
+        limit = client.max_image_bytes
+        if limit and len(image.content) > limit:
+            raise ValueError(
+                f"the snapshot is {len(image.content)} bytes, more than the limit of {limit}"
+            )
+        return image.content
+    except (OSError, ValueError, HomeAssistantError) as exc:
+        _LOGGER.error("Failed to load image from %s: %s", source, exc)
+        return None
+
+
+@callback
+def _async_publish_partial(hass, entry_id, image_name, stage, text):
+    """Push partial text of a streaming analysis to the sensor and event bus."""
+    with hass.data[DOMAIN][entry_id]["profiler"].section("publish_partial"):
+        _async_publish_partial_text(hass, entry_id, image_name, stage, text)
+
+
+@callback
+def _async_publish_partial_text(hass, entry_id, image_name, stage, text):
+    sensor_data = hass.data[DOMAIN][entry_id]["image_sensors"].async_set(
+        image_name,
+        {"final_description" if stage == "text" else "description": text, "partial": True},
+        merge=True,
+    )
+
+    async_dispatcher_send(
+        hass, SIGNAL_IMAGE_SENSOR_UPDATED.format(entry_id), image_name, sensor_data
+    )
+    hass.bus.async_fire(EVENT_PARTIAL, {
+        "integration_id": entry_id,
+        "image_name": image_name,
+        "stage": stage,
+        "text": text,
+    })
+
+
+def _model_timings(prefix, wall_time, stats):
+    """
+    Split the wall time of one model call into Ollama's load, prompt eval and
+    generation durations plus the remaining transfer time (upload, network).
+    """
+    timings = ollama_timings(prefix, stats)
+    if "total_duration" in stats:
+        timings[f"{prefix}_transfer"] = max(0.0, wall_time - stats["total_duration"] / NANOSECONDS)
+    return timings
+
+
+async def async_process_analysis(
+    hass, entry_id_to_use, image_source, vision_prompt, image_name, use_text_model, text_prompt,
+    stream=False, image_data=None, response_format=None, skip_text_if=None, crops=None,
+):
+    """
+    Analyze one image, update its sensor and fire the analyzed event.
+    The vision stage runs through the entry's scheduler and the text stage
+    under its own concurrency limit, so the text model can elaborate one
+    frame while the vision model is already describing the next.
+    image_data may hold the already loaded image bytes. With a
+    response_format the description is JSON, and the text stage is skipped
+    when the skip_text_if expression is true for it. With several crop
+    boxes, from crops or the configured crop regions, every crop is
+    described on its own and the descriptions are merged.
+    """
+    crops = _crop_boxes(hass.data[DOMAIN][entry_id_to_use]["config"], image_name, crops)
+    token = object()
+    if len(crops) > 1:
+        describe = partial(
+            _async_describe_crops, hass, entry_id_to_use, image_source, vision_prompt, image_name,
+            stream, token, time.monotonic(), image_data, response_format, crops,
+        )
+    else:
+        describe = partial(
+            _async_describe, hass, entry_id_to_use, image_source, vision_prompt, image_name,
+            stream, token, time.monotonic(), image_data, response_format,
+            crops[0] if crops else None,
+        )
+    return await _async_run_pipeline(
+        hass, entry_id_to_use, image_name, describe, token, use_text_model, text_prompt, stream,
+        skip_text_if,
+    )
+
+
+async def async_process_combined(
+    hass, entry_id_to_use, images, vision_prompt, image_name, use_text_model, text_prompt,
+    stream=False, response_format=None, skip_text_if=None,
+):
+    """
+    Describe several loaded images with a single vision model call, for
+    prompts that compare or summarize them. images is a list of
+    (image_name, image_source, image_data, crops) tuples; every crop box of
+    an image is sent as an image of its own. The result is published under
+    image_name.
+    """
+    token = object()
+    describe = partial(
+        _async_describe_combined, hass, entry_id_to_use, images, vision_prompt, image_name,
+        stream, token, time.monotonic(), response_format,
+    )
+    return await _async_run_pipeline(
+        hass, entry_id_to_use, image_name, describe, token, use_text_model, text_prompt, stream,
+        skip_text_if,
+    )
+
+
+async def _async_run_pipeline(
+    hass, entry_id_to_use, image_name, describe, token, use_text_model, text_prompt, stream,
+    skip_text_if=None,
+):
+    """Run the vision stage, then the text stage, then publish the result."""
+    entry_data = hass.data[DOMAIN][entry_id_to_use]
+
+    # Vision stage; at most max_in_flight run at once per entry
+    submitted = entry_data["scheduler"].async_submit(
+        image_name, partial(_async_vision_stage, hass, entry_id_to_use, describe)
+    )
+    try:
+        analysis = await submitted
+    except asyncio.CancelledError:
+        # Cancelled by the scheduler, for example on unload, not by our caller
+        if submitted.cancelled() and not asyncio.current_task().cancelling():
+            raise AnalysisDropped(f"Request for {image_name} was cancelled") from None
+        raise
+    if analysis["token"] is not token:
+        # Superseded by a newer frame while queued; share its final result
+        try:
+            return await asyncio.shield(analysis["done"])
+        except asyncio.CancelledError:
+            if analysis["done"].cancelled():
+                raise AnalysisDropped(
+                    f"Request for {image_name} was replaced by one that was cancelled"
+                ) from None
+            raise
+
+    try:
+        # Text stage; only if both the service call requests it and the config has it enabled
+        if use_text_model and entry_data["config"].get(CONF_TEXT_MODEL_ENABLED, False):
+            if _skip_text_stage(hass, skip_text_if, analysis):
+                _LOGGER.debug("Skipping the text model for %s", image_name)
+                analysis["text_skipped"] = True
+            else:
+                await _async_text_stage(hass, entry_id_to_use, analysis, text_prompt, stream)
+        event_data = _async_publish_result(hass, entry_id_to_use, analysis)
+    except asyncio.CancelledError:
+        analysis["done"].cancel()
+        raise
+    except Exception as exc:
+        analysis["done"].set_exception(exc)
+        raise
+    finally:
+        entry_data["profiler"].async_request_done()
+
+    analysis["done"].set_result(event_data)
+    return event_data
+
+
+def _skip_text_stage(hass, skip_text_if, analysis) -> bool:
+    """
+    Whether the skip_text_if expression is true for the structured
+    description. The expression is given without its {{ }}, which Home
+    Assistant would otherwise render in the calling script, where the fields
+    are not defined. Its fields are available as template variables; the
+    answers of several crops only as the structured list.
+    """
+    structured = analysis["structured"]
+    if not skip_text_if or not isinstance(structured, (dict, list)):
+        return False
+    variables = {"structured": structured}
+    if isinstance(structured, dict):
+        variables = {**structured, **variables}
+    try:
+        rendered = Template(f"{{{{ {skip_text_if} }}}}", hass).async_render(
+            variables, parse_result=False
+        )
+    except TemplateError as exc:
+        _LOGGER.warning(
+            "Could not evaluate skip_text_model_if for %s: %s", analysis["image_name"], exc
+        )
+        return False
+    return result_as_boolean(rendered)
+
+
+def _parse_structured(description, image_name):
+    """Parse a structured description. Return None if it is not valid JSON."""
+    try:
+        return json.loads(description)
+    except ValueError:
+        _LOGGER.warning(
+            "Structured description of %s is not valid JSON: %.100s", image_name, description
+        )
+        return None
+
+
+async def _async_vision_stage(hass, entry_id_to_use, describe):
+    """Run a describe coroutine, counting its failures. Return the analysis state."""
+    metrics = hass.data[DOMAIN][entry_id_to_use]["metrics"]
+    try:
+        return await describe()
+    except Exception as exc:
+        metrics.record_error(exc)
+        raise
+
+
+def _crop_boxes(config, image_name, crops=None) -> list:
+    """Crop boxes of an image: those of the service call, else the configured ones."""
+    if crops:
+        return list(crops)
+    return config.get(CONF_CROP_REGIONS, {}).get(image_name, [])
+
+
+def _merge_descriptions(descriptions) -> str:
+    """Merge the descriptions of the crops of one image into one text."""
+    return "\n".join(
+        f"Region {index}: {description}"
+        for index, description in enumerate(descriptions, 1)
+        if description
+    )
+
+
+async def _async_prepare_image(hass, config, image_data, image_name, crop=None):
+    """Crop, downscale and recompress an image off the event loop."""
+    max_dimension = config.get(CONF_MAX_IMAGE_DIMENSION, DEFAULT_MAX_IMAGE_DIMENSION)
+    if max_dimension <= 0 and crop is None:
+        return image_data
+
+    try:
+        prepared = await hass.async_add_executor_job(
+            prepare_image, image_data, max_dimension,
+            config.get(CONF_JPEG_QUALITY, DEFAULT_JPEG_QUALITY), crop,
+        )
+    except ServiceValidationError:
+        raise
+    except Exception as exc:  # pylint: disable=broad-except
+        _LOGGER.warning("Could not preprocess image %s, sending it as-is: %s", image_name, exc)
+        return image_data
+    _LOGGER.debug(
+        "Image %s preprocessed from %d to %d bytes",
+        image_name, len(image_data), len(prepared),
+    )
+    return prepared
+
+
+def _new_analysis(hass, token, submitted_at, image_name, image_source, vision_prompt, **fields):
+    """Create the state passed from the vision stage to the text and publish steps."""
+    done = hass.loop.create_future()
+    # Nobody may wait for the outcome; do not warn about unretrieved errors
+    done.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+    analysis = {
+        "token": token,
+        "done": done,
+        "submitted_at": submitted_at,
+        "image_name": image_name,
+        "image_source": image_source,
+        "prompt": vision_prompt,
+        "reused": False,
+        "used_text_model": False,
+        "text_skipped": False,
+        "text_prompt": None,
+        "text_stats": {},
+        "structured": None,
+        "crops": None,
+    }
+    analysis.update(fields)
+    analysis["final_description"] = analysis["description"]
+    return analysis
+
+
+async def _async_describe(
+    hass, entry_id_to_use, image_source, vision_prompt, image_name, stream, token, submitted_at,
+    image_data=None, response_format=None, crop=None,
+):
+    """Run the vision stage, timing each step."""
+    entry_data = hass.data[DOMAIN][entry_id_to_use]
+    client_to_use = entry_data["client"]
+    config = entry_data["config"]
+
+    started = time.monotonic()
+    timings = {"queue_wait": started - submitted_at}
+
+    # Load the image from its source unless the caller already did
+    if image_data is None:
+        image_data = await async_load_image(hass, client_to_use, image_source)
+        if image_data is None:
+            raise HomeAssistantError("Failed to fetch image")
+        timings["image_load"] = time.monotonic() - started
+    stage_start = time.monotonic()
+
+    # Crop, downscale and recompress off the event loop
+    image_bytes_original = len(image_data)
+    image_data = await _async_prepare_image(hass, config, image_data, image_name, crop)
+
+    # Reuse the previous description if the scene has not visibly changed
+    vision_description = None
+    reused = False
+    scene_threshold = config.get(CONF_SCENE_THRESHOLD, DEFAULT_SCENE_THRESHOLD)
+    scene_hash = None
+    if scene_threshold > 0:
+        try:
+            scene_hash = await hass.async_add_executor_job(perceptual_hash, image_data)
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.debug("Could not hash image %s: %s", image_name, exc)
+        previous = entry_data["scenes"].get(image_name)
+        if (
+            scene_hash is not None
+            and previous is not None
+            and previous["prompt"] == vision_prompt
+            and previous["format"] == response_format
+            and hamming_distance(scene_hash, previous["hash"]) < scene_threshold
+        ):
+            _LOGGER.debug("Scene unchanged for %s, reusing previous description", image_name)
+            vision_description = previous["description"]
+            reused = True
+
+    now = time.monotonic()
+    timings["preprocess"] = now - stage_start
+    stage_start = now
+
     # Analyze the image using the selected client
-    vision_description = await client_to_use.analyze_image(image_url, vision_prompt)
+    vision_stats = {}
+    if vision_description is None:
+        async with entry_data["vision_semaphore"]:
+            vision_description = await client_to_use.describe_image(
+                image_data, vision_prompt,
+                partial(_async_publish_partial, hass, entry_id_to_use, image_name, "vision") if stream else None,
+                vision_stats,
+                entry_data["chats"].get("vision", image_name, vision_prompt),
+                response_format,
+            )
     
     if vision_description is None:
         raise HomeAssistantError("Failed to analyze image")
-    
-    # Determine if we should use the text model for elaboration
-    config = hass.data[DOMAIN][entry_id_to_use]["config"]
-    text_model_enabled = config.get(CONF_TEXT_MODEL_ENABLED, False)
-    
-    # Only elaborate if both the service call requests it and the config has it enabled
-    final_description = vision_description
-    text_prompt_formatted = None
-    if use_text_model and text_model_enabled:
-        text_prompt_formatted = text_prompt.format(description=vision_description)
-        final_description = await client_to_use.elaborate_text(vision_description, text_prompt_formatted)
-    
+
+    if not reused:
+        timings["vision"] = time.monotonic() - stage_start
+        timings.update(_model_timings("vision", timings["vision"], vision_stats))
+
+    if scene_hash is not None and not reused:
+        scenes = entry_data["scenes"]
+        scenes.pop(image_name, None)
+        scenes[image_name] = {
+            "hash": scene_hash,
+            "prompt": vision_prompt,
+            "format": response_format,
+            "description": vision_description,
+        }
+        while len(scenes) > entry_data["image_sensors"].max_entries:
+            scenes.popitem(last=False)
+    elif reused:
+        entry_data["scenes"].move_to_end(image_name)
+
+    return _new_analysis(
+        hass, token, submitted_at, image_name, image_source, vision_prompt,
+        description=vision_description,
+        structured=(
+            _parse_structured(vision_description, image_name) if response_format else None
+        ),
+        reused=reused,
+        image_bytes_original=image_bytes_original,
+        image_bytes_sent=len(image_data),
+        vision_stats=vision_stats,
+        timings=timings,
+    )
+
+
+async def _async_describe_crops(
+    hass, entry_id_to_use, image_source, vision_prompt, image_name, stream, token, submitted_at,
+    image_data, response_format, crops,
+):
+    """
+    Run the vision stage for several crops of one image. The crops are
+    described concurrently, each in a request of its own, and their
+    descriptions merged, or all sent in one request with the Combine
+    Crops option. Unchanged scene detection does not apply.
+    """
+    entry_data = hass.data[DOMAIN][entry_id_to_use]
+    client_to_use = entry_data["client"]
+    config = entry_data["config"]
+
+    started = time.monotonic()
+    timings = {"queue_wait": started - submitted_at}
+
+    if image_data is None:
+        image_data = await async_load_image(hass, client_to_use, image_source)
+        if image_data is None:
+            raise HomeAssistantError("Failed to fetch image")
+        timings["image_load"] = time.monotonic() - started
+    stage_start = time.monotonic()
+
+    prepared = await asyncio.gather(
+        *(_async_prepare_image(hass, config, image_data, image_name, crop) for crop in crops)
+    )
+    now = time.monotonic()
+    timings["preprocess"] = now - stage_start
+    stage_start = now
+
+    if config.get(CONF_COMBINE_CROPS, DEFAULT_COMBINE_CROPS):
+        vision_stats = {}
+        async with entry_data["vision_semaphore"]:
+            description = await client_to_use.describe_images(
+                prepared, vision_prompt,
+                partial(_async_publish_partial, hass, entry_id_to_use, image_name, "vision") if stream else None,
+                vision_stats,
+                entry_data["chats"].get("vision", image_name, vision_prompt),
+                response_format,
+            )
+        if description is None:
+            raise HomeAssistantError("Failed to analyze image")
+
+        timings["vision"] = time.monotonic() - stage_start
+        timings.update(_model_timings("vision", timings["vision"], vision_stats))
+
+        return _new_analysis(
+            hass, token, submitted_at, image_name, image_source, vision_prompt,
+            description=description,
+            structured=_parse_structured(description, image_name) if response_format else None,
+            crops=[{"box": list(crop), "description": None} for crop in crops],
+            image_bytes_original=len(image_data),
+            image_bytes_sent=sum(len(data) for data in prepared),
+            vision_stats=vision_stats,
+            timings=timings,
+        )
+
+    # Stream the merged text of all crops as each of them grows
+    partials = [None] * len(crops)
+
+    @callback
+    def _async_crop_partial(index, text):
+        partials[index] = text
+        _async_publish_partial(
+            hass, entry_id_to_use, image_name, "vision", _merge_descriptions(partials)
+        )
+
+    async def _async_describe_crop(index, data):
+        # Counted against Max Concurrent Analyses like any other vision request
+        async with entry_data["vision_semaphore"]:
+            return await client_to_use.describe_image(
+                data, vision_prompt,
+                partial(_async_crop_partial, index) if stream else None,
+                crop_stats[index],
+                entry_data["chats"].get("vision", f"{image_name}/{index + 1}", vision_prompt),
+                response_format,
+            )
+
+    crop_stats = [{} for _ in crops]
+    descriptions = await asyncio.gather(
+        *(_async_describe_crop(index, data) for index, data in enumerate(prepared))
+    )
+    if all(description is None for description in descriptions):
+        raise HomeAssistantError("Failed to analyze image")
+    if None in descriptions:
+        _LOGGER.warning(
+            "%d of %d crops of %s could not be analyzed",
+            descriptions.count(None), len(crops), image_name,
+        )
+
+    vision_stats = merge_ollama_stats(crop_stats)
+    timings["vision"] = time.monotonic() - stage_start
+    timings.update(_model_timings("vision", timings["vision"], vision_stats))
+
+    structured = None
+    if response_format:
+        structured = [
+            _parse_structured(description, image_name) if description is not None else None
+            for description in descriptions
+        ]
+        if None in structured:
+            structured = None
+
+    return _new_analysis(
+        hass, token, submitted_at, image_name, image_source, vision_prompt,
+        description=_merge_descriptions(descriptions),
+        structured=structured,
+        crops=[
+            {"box": list(crop), "description": description}
+            for crop, description in zip(crops, descriptions)
+        ],
+        image_bytes_original=len(image_data),
+        image_bytes_sent=sum(len(data) for data in prepared),
+        vision_stats=vision_stats,
+        timings=timings,
+    )
+
+
+async def _async_describe_combined(
+    hass, entry_id_to_use, images, vision_prompt, image_name, stream, token, submitted_at,
+    response_format=None,
+):
+    """Run the vision stage for several images sent in one request."""
+    entry_data = hass.data[DOMAIN][entry_id_to_use]
+    config = entry_data["config"]
+
+    started = time.monotonic()
+    timings = {"queue_wait": started - submitted_at}
+
+    prepared = await asyncio.gather(
+        *(
+            _async_prepare_image(hass, config, data, name, crop)
+            for name, _, data, crops in images
+            for crop in _crop_boxes(config, name, crops) or [None]
+        )
+    )
+    stage_start = time.monotonic()
+    timings["preprocess"] = stage_start - started
+
+    vision_stats = {}
+    async with entry_data["vision_semaphore"]:
+        vision_description = await entry_data["client"].describe_images(
+            prepared, vision_prompt,
+            partial(_async_publish_partial, hass, entry_id_to_use, image_name, "vision") if stream else None,
+            vision_stats,
+            entry_data["chats"].get("vision", image_name, vision_prompt),
+            response_format,
+        )
+    if vision_description is None:
+        raise HomeAssistantError("Failed to analyze images")
+
+    timings["vision"] = time.monotonic() - stage_start
+    timings.update(_model_timings("vision", timings["vision"], vision_stats))
+
+    return _new_analysis(
+        hass, token, submitted_at, image_name,
+        (ATTR_IMAGES, [source for _, (_, source), _, _ in images]), vision_prompt,
+        description=vision_description,
+        structured=(
+            _parse_structured(vision_description, image_name) if response_format else None
+        ),
+        image_bytes_original=sum(len(data) for _, _, data, _ in images),
+        image_bytes_sent=sum(len(data) for data in prepared),
+        vision_stats=vision_stats,
+        timings=timings,
+    )
+
+
+async def _async_text_stage(hass, entry_id_to_use, analysis, text_prompt, stream):
+    """Elaborate the vision description with the text model."""
+    entry_data = hass.data[DOMAIN][entry_id_to_use]
+    client_to_use = entry_data["client"]
+    timings = analysis["timings"]
+
+    queued = time.monotonic()
+    async with entry_data["text_semaphore"]:
+        stage_start = time.monotonic()
+        timings["text_queue_wait"] = stage_start - queued
+
+        text_prompt_formatted = text_prompt.format(description=analysis["description"])
+        text_stats = {}
+        final_description = await client_to_use.elaborate_text(
+            analysis["description"], text_prompt_formatted,
+            partial(_async_publish_partial, hass, entry_id_to_use, analysis["image_name"], "text") if stream else None,
+            text_stats,
+            entry_data["chats"].get("text", analysis["image_name"], text_system_prompt(text_prompt)),
+        )
+        timings["text"] = time.monotonic() - stage_start
+        timings.update(_model_timings("text", timings["text"], text_stats))
+
+    analysis.update({
+        "used_text_model": True,
+        "text_prompt": text_prompt_formatted,
+        "final_description": final_description,
+        "text_stats": text_stats,
+    })
+
+
+@callback
+def _async_publish_result(hass, entry_id_to_use, analysis):
+    """Record metrics, update the sensor and fire the analyzed event."""
+    with hass.data[DOMAIN][entry_id_to_use]["profiler"].section("publish_result"):
+        return _async_publish(hass, entry_id_to_use, analysis)
+
+
+@callback
+def _async_publish(hass, entry_id_to_use, analysis):
+    timings = analysis["timings"]
+    timings["total"] = time.monotonic() - analysis["submitted_at"]
+    hass.data[DOMAIN][entry_id_to_use]["metrics"].record(
+        timings, analysis["vision_stats"], analysis["text_stats"]
+    )
+
+    image_name = analysis["image_name"]
+    source_type, source = analysis["image_source"]
+    image_url = source if source_type == ATTR_IMAGE_URL else None
+    used_text_model = analysis["used_text_model"]
+
     # Store data so the sensor can display it
-    pending_sensors = hass.data[DOMAIN].setdefault("pending_sensors", {}).setdefault(entry_id_to_use, {})
-    pending_sensors[image_name] = {
-        "description": vision_description,
+    sensor_data = hass.data[DOMAIN][entry_id_to_use]["image_sensors"].async_set(image_name, {
+        "description": analysis["description"],
         "image_url": image_url,
-        "prompt": vision_prompt,
+        "image_source": source,
+        "prompt": analysis["prompt"],
+        "prompt_hash": prompt_hash(analysis["prompt"]),
         "unique_id": f"{DOMAIN}_{entry_id_to_use}_{image_name}",
-        "final_description": final_description if (use_text_model and text_model_enabled) else None,
-        "text_prompt": text_prompt_formatted,
-        "used_text_model": use_text_model and text_model_enabled
-    }
+        "final_description": analysis["final_description"] if used_text_model else None,
+        "text_prompt": analysis["text_prompt"],
+        "used_text_model": used_text_model,
+        "structured": analysis["structured"],
+        "reused": analysis["reused"],
+        "partial": False,
+    })
+
+    # Hand the result straight to the sensor platform of this entry
+    async_dispatcher_send(
+        hass, SIGNAL_IMAGE_SENSOR_UPDATED.format(entry_id_to_use), image_name, sensor_data
+    )
 
-    # Fire event for sensor creation/update
-    hass.bus.async_fire(f"{DOMAIN}_create_sensor", {
-        "entry_id": entry_id_to_use,
-        "image_name": image_name
+    # Keep a compact record outside the recorder
+    hass.data[DOMAIN][entry_id_to_use]["history"].async_add(image_name, {
+        "time": dt_util.utcnow().isoformat(),
+        "description": analysis["description"],
+        "final_description": analysis["final_description"] if used_text_model else None,
+        "prompt_hash": sensor_data["prompt_hash"],
+        "structured": analysis["structured"],
+        "reused": analysis["reused"],
     })
 
     # Fire user-facing event with all relevant fields
@@ -244,13 +1484,24 @@ async def handle_analyze_image(hass, call):
         "integration_id": entry_id_to_use,
         "image_name": image_name,
         "image_url": image_url,
-        "prompt": vision_prompt,
-        "description": vision_description,
-        "used_text_model": use_text_model and text_model_enabled,
-        "text_prompt": text_prompt_formatted,
-        "final_description": final_description,
+        "image_source": source,
+        "prompt": analysis["prompt"],
+        "description": analysis["description"],
+        "structured": analysis["structured"],
+        "used_text_model": used_text_model,
+        "text_skipped": analysis["text_skipped"],
+        "text_prompt": analysis["text_prompt"],
+        "final_description": analysis["final_description"],
+        "reused": analysis["reused"],
+        "crops": analysis["crops"],
+        "image_bytes_original": analysis["image_bytes_original"],
+        "image_bytes_sent": analysis["image_bytes_sent"],
+        "vision_stats": analysis["vision_stats"],
+        "text_stats": analysis["text_stats"],
+        "timings": {stage: round(duration, 3) for stage, duration in timings.items()},
     }
-    hass.bus.async_fire(EVENT_IMAGE_ANALYZED, event_data)    
+    hass.bus.async_fire(EVENT_IMAGE_ANALYZED, event_data)
+    return event_data
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -263,14 +1514,30 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if len(hass.data[DOMAIN]) <= 1:
             # Unregister service if this is the last instance
             hass.services.async_remove(DOMAIN, SERVICE_ANALYZE_IMAGE)
+            hass.services.async_remove(DOMAIN, SERVICE_ANALYZE_IMAGES)
+            hass.services.async_remove(DOMAIN, SERVICE_PRELOAD_MODELS)
+            hass.services.async_remove(DOMAIN, SERVICE_PURGE_IMAGE_SENSORS)
+            hass.services.async_remove(DOMAIN, SERVICE_GET_HISTORY)
+            hass.services.async_remove(DOMAIN, SERVICE_RESET_CHAT)
         
-        # Remove data for this entry
-        hass.data[DOMAIN].pop(entry.entry_id)
-        if entry.entry_id in hass.data[DOMAIN].get("pending_sensors", {}):
-            hass.data[DOMAIN]["pending_sensors"].pop(entry.entry_id)
+        # Remove data for this entry and close its connection pool
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data["scheduler"].async_shutdown()
+        # Stop analyses, text model requests and preloads still using the pool
+        tasks = [task for task in entry_data["tasks"] if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await entry_data["client"].async_close()
+        entry_data["image_sensors"].async_clear()
+        await entry_data["history"].async_save()
     
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored result history of a removed config entry."""
+    await async_remove_history(hass, entry.entry_id)
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -1,11 +1,154 @@
 """API client for Ollama Vision (collecting NDJSON lines)."""
+import asyncio
 import logging
 import aiohttp
-import base64
+import binascii
 import json
+import time
+
+from .chat import CHAT_IMAGE_MESSAGE
+from .endpoints import EndpointPool, parse_endpoints
+from .profiler import PipelineProfiler
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
 
 _LOGGER = logging.getLogger(__name__)
 
+# Fields of the final NDJSON line reported as request statistics
+OLLAMA_STATS_FIELDS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+    "done_reason",
+)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Raw bytes encoded per step; a multiple of 3 so chunks concatenate cleanly
+BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
+# Size of the reads used when streaming an image download
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Characters following a backslash in the Stop Sequences option
+STOP_SEQUENCE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", ",": ",", "\\": "\\"}
+
+# Minimum seconds between two partial text updates while streaming
+PARTIAL_UPDATE_INTERVAL = 0.25
+
+# Seconds an idle pooled connection is kept open for reuse
+CONNECTION_KEEPALIVE_TIMEOUT = 60
+
+
+def create_session(max_connections, connect_timeout, request_timeout):
+    """
+    Create a pooled aiohttp session for one config entry.
+    Connections to the Ollama hosts are kept alive and reused between calls,
+    and at most max_connections sockets are opened per host.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=max_connections,
+        keepalive_timeout=CONNECTION_KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=request_timeout,
+        connect=connect_timeout,
+        sock_connect=connect_timeout,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def build_generate_body(payload: dict, images: list) -> bytearray:
+    """
+    Serialize a generate/chat payload with Base64-encoded images to JSON bytes.
+    Base64 output never needs JSON escaping, so the images are encoded chunk by
+    chunk straight into one preallocated body buffer instead of building an
+    encoded copy per image and running the JSON encoder over it.
+    Chat payloads get the images on their last message.
+    Blocking; run it in an executor for large images.
+    """
+    if "messages" in payload:
+        # Serialize the messages last, so the body ends with the last message
+        payload = dict(payload)
+        payload["messages"] = payload.pop("messages")
+    body = json.dumps(payload).encode("utf-8")
+    if not images:
+        return bytearray(body)
+
+    closing = b"}]}" if "messages" in payload else b"}"
+    prefix = body[:-len(closing)] + b', "images": ["'
+    separator = b'", "'
+    suffix = b'"]' + closing
+    size = (
+        len(prefix)
+        + sum(4 * ((len(image_data) + 2) // 3) for image_data in images)
+        + len(separator) * (len(images) - 1)
+        + len(suffix)
+    )
+
+    buffer = bytearray(size)
+    offset = 0
+
+    def _write(data):
+        nonlocal offset
+        buffer[offset:offset + len(data)] = data
+        offset += len(data)
+
+    _write(prefix)
+    for index, image_data in enumerate(images):
+        if index:
+            _write(separator)
+        view = memoryview(image_data)
+        for start in range(0, len(view), BASE64_CHUNK_SIZE):
+            _write(binascii.b2a_base64(view[start:start + BASE64_CHUNK_SIZE], newline=False))
+    _write(suffix)
+    return buffer
+
+
+def parse_stop_sequences(text) -> list:
+    r"""
+    Split a comma separated list of stop sequences. Values are kept exactly
+    as typed, spaces included. A backslash escapes the next character:
+    \n, \t and \r stand for a newline, tab and carriage return, \, for a
+    comma and \\ for a backslash. Empty values are dropped.
+    """
+    sequences = []
+    current = []
+    chars = iter(text or "")
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            current.append(STOP_SEQUENCE_ESCAPES.get(escaped, "\\" + escaped))
+        elif char == ",":
+            sequences.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    sequences.append("".join(current))
+    return [sequence for sequence in sequences if sequence]
+
+
+def _record_stats(stats, data_obj):
+    """Copy Ollama's token counts and timings from the final NDJSON line."""
+    if stats is None or data_obj.get("done") is not True:
+        return
+    for field in OLLAMA_STATS_FIELDS:
+        if field in data_obj:
+            stats[field] = data_obj[field]
+
+
+def _response_text(data_obj) -> str:
+    """Text of one NDJSON line of a generate or chat response."""
+    if "response" in data_obj:
+        return data_obj["response"]
+    return (data_obj.get("message") or {}).get("content", "")
+
 
 class OllamaClient:
     """Ollama API client that parses NDJSON lines when stream=true."""
@@ -20,72 +163,252 @@ class OllamaClient:
         text_model=None,
         vision_keepalive=-1,
         text_keepalive=-1,
+        session=None,
+        cache=None,
+        max_image_bytes=None,
+        max_output_chars=0,
+        stop_sequences=None,
+        profiler=None,
     ):
+        self.session = session
+        self.profiler = profiler or PipelineProfiler()
+        self.cache = cache
+        self.max_image_bytes = max_image_bytes
+        self.max_output_chars = max_output_chars
+        self.stop_sequences = [stop for stop in (stop_sequences or []) if stop]
         self.host = host
         self.port = port
         self.model = model
         self.vision_keepalive = vision_keepalive
-        self.api_base_url = f"http://{host}:{port}/api"
+        # host may list several servers; requests are balanced over them
+        self.vision_pool = EndpointPool(parse_endpoints(host, port))
+        self.api_base_url = ", ".join(
+            endpoint.api_base_url for endpoint in self.vision_pool.endpoints
+        )
 
         self.text_enabled = text_host is not None
         self.text_host = text_host
         self.text_port = text_port
         self.text_model = text_model
         self.text_keepalive = text_keepalive
+        self.text_pool = (
+            EndpointPool(parse_endpoints(text_host, text_port)) if self.text_enabled else None
+        )
         self.text_api_base_url = (
-            f"http://{text_host}:{text_port}/api" if self.text_enabled else None
+            ", ".join(endpoint.api_base_url for endpoint in self.text_pool.endpoints)
+            if self.text_enabled else None
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the pooled session, creating a default one if none was given.
+        Raise ClientConnectionError once it is closed, rather than opening a
+        session nobody would close.
+        """
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        elif self.session.closed:
+            raise aiohttp.ClientConnectionError("The Ollama client session is closed")
+        return self.session
+
+    async def async_close(self):
+        """Close the pooled session and all kept-alive connections."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def async_check_health(self):
+        """Health check every vision and text endpoint."""
+        session = self._get_session()
+        await self.vision_pool.async_check_health(session)
+        if self.text_pool is not None:
+            await self.text_pool.async_check_health(session)
+
+    async def async_preload(self, text=True) -> bool:
+        """
+        Load the vision model, and the text model if text is set, on every
+        endpoint by sending a generate request without a prompt. Ollama then
+        keeps them loaded for their keep-alive, so the next real request does
+        not pay the model load time. Return True if every model loaded.
+        """
+        jobs = [
+            self._async_preload_endpoint(endpoint, self.model, self.vision_keepalive)
+            for endpoint in self.vision_pool.endpoints
+        ]
+        if text and self.text_pool is not None:
+            jobs.extend(
+                self._async_preload_endpoint(endpoint, self.text_model, self.text_keepalive)
+                for endpoint in self.text_pool.endpoints
+            )
+        results = await asyncio.gather(*jobs)
+        return all(results)
+
+    async def _async_preload_endpoint(self, endpoint, model, keep_alive) -> bool:
+        payload = {"model": model, "keep_alive": keep_alive, "stream": False}
+        started = time.monotonic()
+        try:
+            session = self._get_session()
+            url = f"{endpoint.api_base_url}/generate"
+            async with session.post(url, json=payload) as resp:
+                if resp.status != 200:
+                    err = await resp.text()
+                    _LOGGER.warning(
+                        "Failed to preload %s at %s: %s", model, endpoint.api_base_url, err
+                    )
+                    return False
+                await resp.read()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            _LOGGER.warning("Failed to preload %s at %s: %s", model, endpoint.api_base_url, exc)
+            return False
+
+        _LOGGER.debug(
+            "Preloaded %s at %s in %.1f s",
+            model, endpoint.api_base_url, time.monotonic() - started,
         )
+        return True
 
     async def analyze_image(self, image_url: str, prompt: str) -> str:
         """
-        Send an image analysis request to Ollama in streaming (NDJSON) mode.
-        Concatenate the .response fields into one final string, or return None on error.
+        Download an image and describe it with the vision model.
+        Return the description, or None on error.
+        """
+        image_data = await self.fetch_image(image_url)
+        if image_data is None:
+            return None
+        return await self.describe_image(image_data, prompt)
+
+    async def fetch_image(self, image_url: str) -> bytearray:
+        """
+        Stream an image download over the pooled session into a single buffer.
+        Bodies larger than max_image_bytes are rejected, up front when the
+        server sends a Content-Length. Return the bytes, or None on error.
         """
         try:
-            # 1) Download the image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as resp:
-                    if resp.status != 200:
-                        _LOGGER.error("Failed to fetch image from URL: %s", image_url)
+            session = self._get_session()
+            async with session.get(image_url) as resp:
+                if resp.status != 200:
+                    _LOGGER.error("Failed to fetch image from URL: %s", image_url)
+                    return None
+
+                limit = self.max_image_bytes
+                expected = resp.content_length
+                if limit and expected is not None and expected > limit:
+                    _LOGGER.error(
+                        "Image at %s is %d bytes, more than the limit of %d",
+                        image_url, expected, limit,
+                    )
+                    return None
+
+                buffer = bytearray(expected or 0)
+                received = 0
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    end = received + len(chunk)
+                    if limit and end > limit:
+                        _LOGGER.error(
+                            "Image at %s exceeds the limit of %d bytes", image_url, limit
+                        )
                         return None
-                    image_data = await resp.read()
+                    buffer[received:end] = chunk
+                    received = end
 
-            # 2) Convert to Base64
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
+                # Drop the tail if the server sent less than announced
+                del buffer[received:]
+                return buffer
 
-            # 3) Build request payload with stream=true
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.error("Error fetching image: %s", exc)
+            return None
+
+    async def describe_image(
+        self, image_data: bytes, prompt: str, on_partial=None, stats=None, chat=None,
+        response_format=None,
+    ) -> str:
+        """
+        Send an image analysis request to Ollama in streaming (NDJSON) mode.
+        Concatenate the .response fields into one final string, or return None on error.
+        If on_partial is given it is called with the text generated so far
+        while the response streams in; stats is filled with Ollama's timings.
+        With a chat session the request goes to /api/chat instead, with the
+        session's system message and history; prompt is then unused.
+        response_format is passed to Ollama as format: "json" or a JSON schema
+        the description must follow.
+        """
+        return await self.describe_images(
+            [image_data], prompt, on_partial, stats, chat, response_format
+        )
+
+    async def describe_images(
+        self, images: list, prompt: str, on_partial=None, stats=None, chat=None,
+        response_format=None,
+    ) -> str:
+        """
+        Describe one or more images with a single vision model request, as
+        describe_image does for one. Return None on error.
+        """
+        try:
+            # 1) Identical bytes, model, prompt, format and history give the same description
+            loop = asyncio.get_running_loop()
+            history = chat.history() if chat is not None else []
+            cache_key = None
+            if self.cache is not None and self.cache.enabled:
+                cache_key = await loop.run_in_executor(
+                    None, self.cache.make_key, *images, self.model, prompt,
+                    json.dumps(response_format, sort_keys=True), *history
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    _LOGGER.debug("Vision cache hit")
+                    if stats is not None:
+                        stats["cached"] = True
+                    if chat is not None:
+                        chat.add_turn(CHAT_IMAGE_MESSAGE, cached)
+                    return cached
+
+            # 2) Build request payload with stream=true; the Base64 encoding
+            # and JSON serialization of the image happen in an executor thread
             payload = {
                 "model": self.model,
                 "prompt": prompt,
-                "images": [image_base64],
                 "stream": True,
                 "keep_alive": self.vision_keepalive
             }
+            if chat is not None:
+                del payload["prompt"]
+                payload["messages"] = chat.messages(CHAT_IMAGE_MESSAGE)
+            if response_format is not None:
+                payload["format"] = response_format
+            if self.stop_sequences:
+                payload["options"] = {"stop": self.stop_sequences}
+            body = await loop.run_in_executor(
+                None, build_generate_body, payload, images
+            )
 
             _LOGGER.debug("Vision model: %s", self.model)
             _LOGGER.debug("Vision API: %s", self.api_base_url)
             _LOGGER.debug("Vision prompt: %s", prompt)
 
-            # 4) Make the POST request and parse NDJSON lines
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.api_base_url}/generate"
-                async with session.post(url, json=payload) as gen_response:
-                    if gen_response.status != 200:
-                        text = await gen_response.text()
-                        _LOGGER.error("Failed response from Ollama: %s", text)
-                        return None
-
-                    final_text = await self._collect_ndjson(gen_response)
-                    return final_text
+            # 3) Make the POST request and parse NDJSON lines
+            final_text = await self._async_generate(
+                self.vision_pool, "generate" if chat is None else "chat", body, on_partial, stats
+            )
+            if cache_key is not None and final_text:
+                self.cache.set(cache_key, final_text)
+            if chat is not None and final_text:
+                chat.add_turn(CHAT_IMAGE_MESSAGE, final_text)
+            return final_text
 
         except Exception as exc:  # pylint: disable=broad-except
             _LOGGER.error("Error analyzing image: %s", exc)
             return None
 
-    async def elaborate_text(self, text: str, prompt_template: str) -> str:
+    async def elaborate_text(
+        self, text: str, prompt_template: str, on_partial=None, stats=None, chat=None
+    ) -> str:
         """
         Same NDJSON approach for text elaboration, if the user has a text model.
-        Concatenate partial tokens from .response
+        Concatenate partial tokens from .response, reporting them to on_partial
+        and Ollama's timings to stats if given. With a chat session, text is
+        sent as the next user message of the session instead.
         """
         if not self.text_enabled:
             # fallback
@@ -101,53 +424,189 @@ class OllamaClient:
                 "stream": True,
                 "keep_alive": self.text_keepalive
             }
+            if chat is not None:
+                del payload["prompt"]
+                payload["messages"] = chat.messages(text)
+            if self.stop_sequences:
+                payload["options"] = {"stop": self.stop_sequences}
 
             _LOGGER.debug("Text model: %s", self.text_model)
             _LOGGER.debug("Text API: %s", self.text_api_base_url)
             _LOGGER.debug("Text prompt: %s", prompt)
 
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.text_api_base_url}/generate"
-                async with session.post(url, json=payload) as gen_response:
-                    if gen_response.status != 200:
-                        err = await gen_response.text()
-                        _LOGGER.error("Failed response from text Ollama: %s", err)
-                        return text
+            cache_key = None
+            if self.cache is not None and self.cache.enabled:
+                with self.profiler.section("text_cache_lookup"):
+                    history = chat.history() if chat is not None else []
+                    cache_key = self.cache.make_key(text, self.text_model, prompt, *history)
+                    cached = self.cache.get(cache_key)
+                if cached is not None:
+                    _LOGGER.debug("Text cache hit")
+                    if stats is not None:
+                        stats["cached"] = True
+                    if chat is not None:
+                        chat.add_turn(text, cached)
+                    return cached
 
-                    final_text = await self._collect_ndjson(gen_response)
-                    return final_text or text
+            with self.profiler.section("build_text_request"):
+                body = build_generate_body(payload, [])
+            final_text = await self._async_generate(
+                self.text_pool, "generate" if chat is None else "chat", body, on_partial, stats
+            )
+            if cache_key is not None and final_text:
+                self.cache.set(cache_key, final_text)
+            if chat is not None and final_text:
+                chat.add_turn(text, final_text)
+            return final_text or text
 
         except Exception as exc:  # pylint: disable=broad-except
             _LOGGER.error("Error elaborating text: %s", exc)
             return text
 
-    async def _collect_ndjson(self, response: aiohttp.ClientResponse) -> str:
+    async def _async_generate(self, pool, path, body, on_partial=None, stats=None) -> str:
+        """
+        POST a request body to the best endpoint of pool and collect the
+        NDJSON response. Connection errors, timeouts and 5xx responses fail
+        over to the next endpoint, but only until the response body starts
+        streaming; partial text may have been published by then, so a
+        failure past that point is not retried. Return the text, or None on
+        failure.
+        """
+        session = self._get_session()
+        tried = []
+        while True:
+            endpoint = pool.select(tried)
+            if endpoint is None:
+                _LOGGER.error("No Ollama endpoint could serve the request")
+                return None
+            tried.append(endpoint)
+
+            endpoint.outstanding += 1
+            started = time.monotonic()
+            try:
+                url = f"{endpoint.api_base_url}/{path}"
+                async with session.post(url, data=body, headers=JSON_HEADERS) as gen_response:
+                    if gen_response.status != 200:
+                        err = await gen_response.text()
+                        _LOGGER.error(
+                            "Failed response from Ollama at %s: %s", endpoint.api_base_url, err
+                        )
+                        if gen_response.status >= 500:
+                            pool.record_failure(endpoint)
+                            continue
+                        return None
+
+                    pool.record_success(endpoint, time.monotonic() - started)
+                    if stats is not None:
+                        stats["endpoint"] = endpoint.api_base_url
+                    try:
+                        return await self._collect_ndjson(gen_response, on_partial, stats)
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                        _LOGGER.error(
+                            "Ollama endpoint %s failed while streaming: %s",
+                            endpoint.api_base_url, exc,
+                        )
+                        pool.record_failure(endpoint)
+                        return None
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                _LOGGER.warning("Ollama endpoint %s failed: %s", endpoint.api_base_url, exc)
+                pool.record_failure(endpoint)
+            finally:
+                endpoint.outstanding -= 1
+
+    async def _collect_ndjson(
+        self, response: aiohttp.ClientResponse, on_partial=None, stats=None
+    ) -> str:
         """
         Collect NDJSON lines of the form:
             {"response":" The", "done":false}
-        and keep appending .response to a list.
+        or, from /api/chat:
+            {"message":{"role":"assistant","content":" The"}, "done":false}
+        and keep appending the text to a list.
         Stop if 'done': true or if no more lines.
+        The body is read in whatever chunks arrive and split into lines here,
+        so lines may span chunks. Generation is cut short, and the connection
+        closed so Ollama stops generating, once max_output_chars or one of the
+        stop_sequences is reached.
+        If on_partial is given, call it with the text so far at most once
+        every PARTIAL_UPDATE_INTERVAL seconds. If stats is given, it is filled
+        with Ollama's token counts and timings (durations in nanoseconds).
         Return the concatenated text.
         """
         collected_parts = []
-        async for raw_line in response.content:
-            line = raw_line.decode("utf-8").rstrip("\n")
-            if not line.strip():
-                continue  # skip empty lines
+        length = 0
+        tail = ""
+        max_stop_len = max((len(stop) for stop in self.stop_sequences), default=0)
+        last_partial = time.monotonic()
+        pending = b""
+        done = False
+        stopped = False
 
-            # Each line is a full JSON object
-            try:
-                data_obj = json.loads(line)
-            except json.JSONDecodeError:
-                _LOGGER.warning("NDJSON parse error on line: %r", line)
-                continue
+        async for chunk in response.content.iter_any():
+            with self.profiler.section("parse_ndjson"):
+                pending += chunk
+                lines = pending.split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    if not line.strip():
+                        continue  # skip empty lines
+
+                    # Each line is a full JSON object
+                    try:
+                        data_obj = _json_loads(line)
+                    except ValueError:
+                        _LOGGER.warning("NDJSON parse error on line: %r", line)
+                        continue
 
-            # Extract the partial text
-            partial = data_obj.get("response", "")
-            collected_parts.append(partial)
+                    # Extract the partial text
+                    partial = _response_text(data_obj)
+                    if partial:
+                        collected_parts.append(partial)
+                        length += len(partial)
 
-            # If done == true, we can break
-            if data_obj.get("done") is True:
+                    # If done == true, we can break
+                    if data_obj.get("done") is True:
+                        _record_stats(stats, data_obj)
+                        done = True
+                        break
+
+                    # Enforce stop sequences and the output length limit
+                    if max_stop_len and partial:
+                        window = tail + partial
+                        hits = [window.find(stop) for stop in self.stop_sequences]
+                        hits = [index for index in hits if index >= 0]
+                        if hits:
+                            text = "".join(collected_parts)
+                            collected_parts = [text[:length - len(window) + min(hits)]]
+                            stopped = True
+                            break
+                        tail = window[-max_stop_len:]
+                    if self.max_output_chars and length >= self.max_output_chars:
+                        collected_parts = ["".join(collected_parts)[:self.max_output_chars]]
+                        stopped = True
+                        break
+
+                    if on_partial is not None and time.monotonic() - last_partial >= PARTIAL_UPDATE_INTERVAL:
+                        last_partial = time.monotonic()
+                        on_partial("".join(collected_parts))
+
+            if done or stopped:
                 break
 
+        if stopped:
+            # Drop the connection so Ollama stops generating
+            _LOGGER.debug("Output limit reached, closing the generate stream early")
+            response.close()
+            if stats is not None:
+                stats["stopped_early"] = True
+        elif not done and pending.strip():
+            # Last line without a trailing newline
+            try:
+                data_obj = _json_loads(pending)
+                collected_parts.append(_response_text(data_obj))
+                _record_stats(stats, data_obj)
+            except ValueError:
+                _LOGGER.warning("NDJSON parse error on line: %r", pending)
+
         return "".join(collected_parts)
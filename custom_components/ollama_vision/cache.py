@@ -0,0 +1,90 @@
+"""Content-addressed result cache for Ollama Vision."""
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    LRU cache of model outputs keyed on a hash of the model inputs.
+    Entries expire after ttl seconds; the least recently used entries are
+    evicted once max_entries or max_bytes (size of the cached text) is
+    exceeded. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are cached at all."""
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the given str/bytes parts into a cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            # Length prefix so ("ab", "c") and ("a", "bc") differ
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value: str):
+        """Cache value under key, evicting old entries as needed."""
+        if not self.enabled or value is None:
+            return
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    @property
+    def stats(self) -> dict:
+        """Cache statistics suitable for sensor attributes."""
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_evictions": self.evictions,
+            "cache_entries": len(self._entries),
+            "cache_bytes": self._bytes,
+        }
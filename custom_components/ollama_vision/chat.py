@@ -0,0 +1,108 @@
+"""Per-image chat sessions for Ollama's /api/chat."""
+import logging
+import time
+from collections import OrderedDict, deque
+
+_LOGGER = logging.getLogger(__name__)
+
+# User message sent with every image; the vision prompt is the system message
+CHAT_IMAGE_MESSAGE = "Here is the latest image."
+
+# Stands in for {description} in a text prompt used as the system message
+CHAT_DESCRIPTION_REFERENCE = "the description in the user's message"
+
+
+def text_system_prompt(prompt_template) -> str:
+    """Turn a text prompt template into a system message for chat mode."""
+    return prompt_template.replace("{description}", CHAT_DESCRIPTION_REFERENCE)
+
+
+class ChatSession:
+    """
+    One conversation with a model: a fixed system message and the last
+    max_turns exchanges. Images are not kept in the history, only the text
+    of each turn, so earlier frames cost a few tokens rather than a re-upload.
+    """
+
+    def __init__(self, system, max_turns):
+        self.system = system
+        self.turns = deque(maxlen=max_turns)
+        self.updated = time.monotonic()
+
+    def messages(self, content) -> list:
+        """Return the messages of a request sending content as the next turn."""
+        messages = [{"role": "system", "content": self.system}]
+        for user, assistant in self.turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": assistant})
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    def history(self) -> list:
+        """Texts of the kept turns, for cache keys."""
+        return [text for turn in self.turns for text in turn]
+
+    def add_turn(self, user, assistant):
+        """Record a finished exchange, dropping the oldest beyond max_turns."""
+        if self.turns.maxlen:
+            self.turns.append((user, assistant))
+        self.updated = time.monotonic()
+
+
+class ChatSessions:
+    """
+    Chat sessions of one config entry, one per stage and image name, so the
+    system prompt stays a fixed prefix Ollama can reuse from its prompt cache.
+    A session starts over when its system prompt changes, when it has been
+    idle for idle_reset seconds (0 never) or when reset. At most
+    max_sessions are kept, the least recently used dropped first.
+    """
+
+    def __init__(self, enabled, max_turns, idle_reset, max_sessions):
+        self.enabled = enabled
+        self.max_turns = max_turns
+        self.idle_reset = idle_reset
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self.resets = 0
+
+    def get(self, stage, image_name, system) -> ChatSession:
+        """Return the session of image_name for stage, or None if chat is off."""
+        if not self.enabled:
+            return None
+
+        key = (stage, image_name)
+        session = self._sessions.pop(key, None)
+        if session is not None and (
+            session.system != system
+            or (self.idle_reset > 0 and time.monotonic() - session.updated > self.idle_reset)
+        ):
+            _LOGGER.debug("Starting a new %s chat for %s", stage, image_name)
+            self.resets += 1
+            session = None
+        if session is None:
+            session = ChatSession(system, self.max_turns)
+        self._sessions[key] = session
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def reset(self, image_name=None) -> int:
+        """Forget the sessions of image_name, or all. Return how many."""
+        keys = [
+            key for key in self._sessions
+            if image_name is None or key[1] == image_name
+        ]
+        for key in keys:
+            del self._sessions[key]
+        self.resets += len(keys)
+        return len(keys)
+
+    @property
+    def stats(self) -> dict:
+        """Session statistics suitable for sensor attributes."""
+        return {
+            "chat_sessions": len(self._sessions),
+            "chat_resets": self.resets,
+        }
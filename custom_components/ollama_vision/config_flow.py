@@ -22,8 +22,67 @@ from .const import (
     DEFAULT_TEXT_MODEL,
     CONF_VISION_KEEPALIVE,
     DEFAULT_KEEPALIVE,
-    CONF_TEXT_KEEPALIVE
+    CONF_TEXT_KEEPALIVE,
+    CONF_MAX_CONNECTIONS,
+    CONF_CONNECT_TIMEOUT,
+    CONF_REQUEST_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MAX_QUEUE,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_QUEUE,
+    CONF_TEXT_MAX_IN_FLIGHT,
+    DEFAULT_TEXT_MAX_IN_FLIGHT,
+    CONF_CACHE_TTL,
+    CONF_CACHE_MAX_ENTRIES,
+    CONF_CACHE_MAX_BYTES,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CACHE_MAX_ENTRIES,
+    DEFAULT_CACHE_MAX_BYTES,
+    CONF_SCENE_THRESHOLD,
+    DEFAULT_SCENE_THRESHOLD,
+    CONF_MAX_IMAGE_DIMENSION,
+    CONF_JPEG_QUALITY,
+    CONF_CROP_REGIONS,
+    CONF_COMBINE_CROPS,
+    DEFAULT_MAX_IMAGE_DIMENSION,
+    DEFAULT_JPEG_QUALITY,
+    DEFAULT_CROP_REGIONS,
+    DEFAULT_COMBINE_CROPS,
+    CONF_MAX_IMAGE_SIZE,
+    DEFAULT_MAX_IMAGE_SIZE,
+    CONF_MAX_OUTPUT_CHARS,
+    CONF_STOP_SEQUENCES,
+    DEFAULT_MAX_OUTPUT_CHARS,
+    DEFAULT_STOP_SEQUENCES,
+    CONF_WARMUP_ON_SETUP,
+    CONF_KEEP_WARM_INTERVAL,
+    CONF_KEEP_WARM_HOURS,
+    DEFAULT_WARMUP_ON_SETUP,
+    DEFAULT_KEEP_WARM_INTERVAL,
+    DEFAULT_KEEP_WARM_HOURS,
+    CONF_MAX_IMAGE_SENSORS,
+    CONF_IMAGE_SENSOR_TTL,
+    DEFAULT_MAX_IMAGE_SENSORS,
+    DEFAULT_IMAGE_SENSOR_TTL,
+    CONF_INCLUDE_PROMPTS,
+    CONF_HISTORY_SIZE,
+    DEFAULT_INCLUDE_PROMPTS,
+    DEFAULT_HISTORY_SIZE,
+    CONF_DIAGNOSTICS,
+    CONF_PROFILE_REQUESTS,
+    DEFAULT_DIAGNOSTICS,
+    DEFAULT_PROFILE_REQUESTS,
+    CONF_CHAT_MODE,
+    CONF_CHAT_HISTORY,
+    CONF_CHAT_RESET,
+    DEFAULT_CHAT_MODE,
+    DEFAULT_CHAT_HISTORY,
+    DEFAULT_CHAT_RESET,
 )
+from .endpoints import parse_endpoints
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -44,8 +103,10 @@ class OllamaVisionConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             # Test connection to Ollama vision server
             try:
+                # Several comma separated hosts may be given; the first must answer
+                endpoints = parse_endpoints(user_input[CONF_HOST], user_input[CONF_PORT])
                 session = aiohttp.ClientSession()
-                api_url = f"http://{user_input[CONF_HOST]}:{user_input[CONF_PORT]}/api/version"
+                api_url = f"{endpoints[0]}/version"
                 async with session.get(api_url) as response:
                     if response.status == 200:
                         await session.close()
@@ -65,6 +126,8 @@ class OllamaVisionConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     
                     errors["base"] = "cannot_connect"
                 await session.close()
+            except ValueError:
+                errors["base"] = "invalid_host"
             except aiohttp.ClientError:
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
@@ -92,8 +155,9 @@ class OllamaVisionConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             # Test connection to text model Ollama server
             try:
+                endpoints = parse_endpoints(user_input[CONF_TEXT_HOST], user_input[CONF_TEXT_PORT])
                 session = aiohttp.ClientSession()
-                api_url = f"http://{user_input[CONF_TEXT_HOST]}:{user_input[CONF_TEXT_PORT]}/api/version"
+                api_url = f"{endpoints[0]}/version"
                 async with session.get(api_url) as response:
                     if response.status == 200:
                         await session.close()
@@ -108,6 +172,8 @@ class OllamaVisionConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     
                     errors["base"] = "cannot_connect"
                 await session.close()
+            except ValueError:
+                errors["base"] = "invalid_host"
             except aiohttp.ClientError:
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
@@ -143,8 +209,16 @@ class OllamaVisionOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Handle options flow."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            try:
+                parse_endpoints(user_input[CONF_HOST], user_input[CONF_PORT])
+                if user_input.get(CONF_TEXT_HOST):
+                    parse_endpoints(user_input[CONF_TEXT_HOST], user_input.get(CONF_TEXT_PORT))
+            except ValueError:
+                errors["base"] = "invalid_host"
+            else:
+                return self.async_create_entry(title="", data=user_input)
 
         options = self.config_entry.options
         data = self.config_entry.data
@@ -194,8 +268,161 @@ class OllamaVisionOptionsFlow(config_entries.OptionsFlow):
                     default=options.get(CONF_TEXT_KEEPALIVE, data.get(CONF_TEXT_KEEPALIVE, DEFAULT_KEEPALIVE))
                 ): int,
             })
+
+        # Connection pool and timeout settings
+        schema.update({
+            vol.Optional(
+                CONF_MAX_CONNECTIONS,
+                default=options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS)
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                CONF_CONNECT_TIMEOUT,
+                default=options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT)
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                CONF_REQUEST_TIMEOUT,
+                default=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+            ): vol.All(int, vol.Range(min=1)),
+        })
+
+        # Request scheduling settings
+        schema.update({
+            vol.Optional(
+                CONF_MAX_IN_FLIGHT,
+                default=options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT)
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                CONF_MAX_QUEUE,
+                default=options.get(CONF_MAX_QUEUE, DEFAULT_MAX_QUEUE)
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                CONF_TEXT_MAX_IN_FLIGHT,
+                default=options.get(CONF_TEXT_MAX_IN_FLIGHT, DEFAULT_TEXT_MAX_IN_FLIGHT)
+            ): vol.All(int, vol.Range(min=1)),
+        })
+
+        # Result cache settings
+        schema.update({
+            vol.Optional(
+                CONF_CACHE_TTL,
+                default=options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_CACHE_MAX_ENTRIES,
+                default=options.get(CONF_CACHE_MAX_ENTRIES, DEFAULT_CACHE_MAX_ENTRIES)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_CACHE_MAX_BYTES,
+                default=options.get(CONF_CACHE_MAX_BYTES, DEFAULT_CACHE_MAX_BYTES)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_SCENE_THRESHOLD,
+                default=options.get(CONF_SCENE_THRESHOLD, DEFAULT_SCENE_THRESHOLD)
+            ): vol.All(int, vol.Range(min=0, max=64)),
+        })
+
+        # Image download and preprocessing settings
+        schema.update({
+            vol.Optional(
+                CONF_MAX_IMAGE_SIZE,
+                default=options.get(CONF_MAX_IMAGE_SIZE, DEFAULT_MAX_IMAGE_SIZE)
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                CONF_MAX_IMAGE_DIMENSION,
+                default=options.get(CONF_MAX_IMAGE_DIMENSION, DEFAULT_MAX_IMAGE_DIMENSION)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_JPEG_QUALITY,
+                default=options.get(CONF_JPEG_QUALITY, DEFAULT_JPEG_QUALITY)
+            ): vol.All(int, vol.Range(min=1, max=95)),
+            vol.Optional(
+                CONF_CROP_REGIONS,
+                default=options.get(CONF_CROP_REGIONS, DEFAULT_CROP_REGIONS)
+            ): str,
+            vol.Optional(
+                CONF_COMBINE_CROPS,
+                default=options.get(CONF_COMBINE_CROPS, DEFAULT_COMBINE_CROPS)
+            ): bool,
+        })
+
+        # Generation limits
+        schema.update({
+            vol.Optional(
+                CONF_MAX_OUTPUT_CHARS,
+                default=options.get(CONF_MAX_OUTPUT_CHARS, DEFAULT_MAX_OUTPUT_CHARS)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_STOP_SEQUENCES,
+                default=options.get(CONF_STOP_SEQUENCES, DEFAULT_STOP_SEQUENCES)
+            ): str,
+        })
+
+        # Model warm-up settings
+        schema.update({
+            vol.Optional(
+                CONF_WARMUP_ON_SETUP,
+                default=options.get(CONF_WARMUP_ON_SETUP, DEFAULT_WARMUP_ON_SETUP)
+            ): bool,
+            vol.Optional(
+                CONF_KEEP_WARM_INTERVAL,
+                default=options.get(CONF_KEEP_WARM_INTERVAL, DEFAULT_KEEP_WARM_INTERVAL)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_KEEP_WARM_HOURS,
+                default=options.get(CONF_KEEP_WARM_HOURS, DEFAULT_KEEP_WARM_HOURS)
+            ): str,
+        })
+
+        # Image sensor limits, attributes and history
+        schema.update({
+            vol.Optional(
+                CONF_MAX_IMAGE_SENSORS,
+                default=options.get(CONF_MAX_IMAGE_SENSORS, DEFAULT_MAX_IMAGE_SENSORS)
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                CONF_IMAGE_SENSOR_TTL,
+                default=options.get(CONF_IMAGE_SENSOR_TTL, DEFAULT_IMAGE_SENSOR_TTL)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_INCLUDE_PROMPTS,
+                default=options.get(CONF_INCLUDE_PROMPTS, DEFAULT_INCLUDE_PROMPTS)
+            ): bool,
+            vol.Optional(
+                CONF_HISTORY_SIZE,
+                default=options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE)
+            ): vol.All(int, vol.Range(min=0)),
+        })
+
+        # Chat sessions
+        schema.update({
+            vol.Optional(
+                CONF_CHAT_MODE,
+                default=options.get(CONF_CHAT_MODE, DEFAULT_CHAT_MODE)
+            ): bool,
+            vol.Optional(
+                CONF_CHAT_HISTORY,
+                default=options.get(CONF_CHAT_HISTORY, DEFAULT_CHAT_HISTORY)
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                CONF_CHAT_RESET,
+                default=options.get(CONF_CHAT_RESET, DEFAULT_CHAT_RESET)
+            ): vol.All(int, vol.Range(min=0)),
+        })
+
+        # Event loop diagnostics
+        schema.update({
+            vol.Optional(
+                CONF_DIAGNOSTICS,
+                default=options.get(CONF_DIAGNOSTICS, DEFAULT_DIAGNOSTICS)
+            ): bool,
+            vol.Optional(
+                CONF_PROFILE_REQUESTS,
+                default=options.get(CONF_PROFILE_REQUESTS, DEFAULT_PROFILE_REQUESTS)
+            ): vol.All(int, vol.Range(min=0)),
+        })
         
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(schema),
+            errors=errors,
         )
@@ -21,9 +21,35 @@ ATTR_IMAGE_URL = "image_url"
 ATTR_PROMPT = "prompt"
 ATTR_IMAGE_NAME = "image_name"
 ATTR_DEVICE_ID = "device_id"
+ATTR_IMAGE_PATH = "image_path"
+ATTR_CAMERA_ENTITY = "camera_entity"
+ATTR_STREAM = "stream"
+ATTR_TIMEOUT = "timeout"
+ATTR_FORMAT = "format"
+ATTR_SKIP_TEXT_MODEL_IF = "skip_text_model_if"
+ATTR_CROPS = "crops"
+
+SERVICE_PRELOAD_MODELS = "preload_models"
+
+SERVICE_ANALYZE_IMAGES = "analyze_images"
+ATTR_IMAGES = "images"
+ATTR_COMBINE = "combine"
+
+SERVICE_PURGE_IMAGE_SENSORS = "purge_image_sensors"
+ATTR_MAX_AGE = "max_age"
+
+SERVICE_GET_HISTORY = "get_history"
+ATTR_LIMIT = "limit"
+
+SERVICE_RESET_CHAT = "reset_chat"
 
 # Event constants
 EVENT_IMAGE_ANALYZED = "ollama_vision_image_analyzed"
+EVENT_PARTIAL = "ollama_vision_partial"
+EVENT_BATCH_ANALYZED = "ollama_vision_batch_analyzed"
+
+# Dispatcher signal for image sensor results, formatted with the entry id
+SIGNAL_IMAGE_SENSOR_UPDATED = f"{DOMAIN}_image_sensor_updated_{{}}"
 
 # Textual model (optional)
 CONF_TEXT_MODEL_ENABLED = "text_model_enabled"
@@ -38,3 +64,83 @@ DEFAULT_TEXT_PROMPT = "You are an AI that introduces people who come to visit me
 # Textual model service call constants
 ATTR_USE_TEXT_MODEL = "use_text_model"
 ATTR_TEXT_PROMPT = "text_prompt"
+
+# Connection pool and timeouts (options)
+CONF_MAX_CONNECTIONS = "max_connections"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+DEFAULT_MAX_CONNECTIONS = 4
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_REQUEST_TIMEOUT = 300
+
+# Request scheduling (options)
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+CONF_MAX_QUEUE = "max_queue"
+CONF_TEXT_MAX_IN_FLIGHT = "text_max_in_flight"
+DEFAULT_MAX_IN_FLIGHT = 2
+DEFAULT_MAX_QUEUE = 10
+DEFAULT_TEXT_MAX_IN_FLIGHT = 2
+
+# Result cache (options)
+CONF_CACHE_TTL = "cache_ttl"
+CONF_CACHE_MAX_ENTRIES = "cache_max_entries"
+CONF_CACHE_MAX_BYTES = "cache_max_bytes"
+DEFAULT_CACHE_TTL = 60
+DEFAULT_CACHE_MAX_ENTRIES = 100
+DEFAULT_CACHE_MAX_BYTES = 1000000
+
+# Scene change detection (options)
+CONF_SCENE_THRESHOLD = "scene_threshold"
+DEFAULT_SCENE_THRESHOLD = 0
+
+# Image preprocessing (options)
+CONF_MAX_IMAGE_DIMENSION = "max_image_dimension"
+CONF_JPEG_QUALITY = "jpeg_quality"
+CONF_CROP_REGIONS = "crop_regions"
+CONF_COMBINE_CROPS = "combine_crops"
+DEFAULT_MAX_IMAGE_DIMENSION = 0
+DEFAULT_JPEG_QUALITY = 85
+DEFAULT_CROP_REGIONS = ""
+DEFAULT_COMBINE_CROPS = False
+CONF_MAX_IMAGE_SIZE = "max_image_size"
+DEFAULT_MAX_IMAGE_SIZE = 20
+
+# Generation limits (options)
+CONF_MAX_OUTPUT_CHARS = "max_output_chars"
+CONF_STOP_SEQUENCES = "stop_sequences"
+DEFAULT_MAX_OUTPUT_CHARS = 0
+DEFAULT_STOP_SEQUENCES = ""
+
+# Model warm-up (options)
+CONF_WARMUP_ON_SETUP = "warmup_on_setup"
+CONF_KEEP_WARM_INTERVAL = "keep_warm_interval"
+CONF_KEEP_WARM_HOURS = "keep_warm_hours"
+DEFAULT_WARMUP_ON_SETUP = False
+DEFAULT_KEEP_WARM_INTERVAL = 0
+DEFAULT_KEEP_WARM_HOURS = ""
+
+# Image sensor limits (options)
+CONF_MAX_IMAGE_SENSORS = "max_image_sensors"
+CONF_IMAGE_SENSOR_TTL = "image_sensor_ttl"
+DEFAULT_MAX_IMAGE_SENSORS = 100
+DEFAULT_IMAGE_SENSOR_TTL = 0
+
+# Sensor attributes and result history (options)
+CONF_INCLUDE_PROMPTS = "include_prompts"
+CONF_HISTORY_SIZE = "history_size"
+DEFAULT_INCLUDE_PROMPTS = False
+DEFAULT_HISTORY_SIZE = 10
+
+# Event loop diagnostics (options)
+CONF_DIAGNOSTICS = "diagnostics"
+CONF_PROFILE_REQUESTS = "profile_requests"
+DEFAULT_DIAGNOSTICS = False
+DEFAULT_PROFILE_REQUESTS = 0
+
+# Chat sessions (options)
+CONF_CHAT_MODE = "chat_mode"
+CONF_CHAT_HISTORY = "chat_history"
+CONF_CHAT_RESET = "chat_reset"
+DEFAULT_CHAT_MODE = False
+DEFAULT_CHAT_HISTORY = 2
+DEFAULT_CHAT_RESET = 30
@@ -0,0 +1,40 @@
+"""Diagnostics support for Ollama Vision."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_HOST, CONF_TEXT_HOST
+
+TO_REDACT = {CONF_HOST, CONF_TEXT_HOST, "url"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    client = entry_data["client"]
+    metrics = entry_data["metrics"]
+
+    return async_redact_data(
+        {
+            "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+            "scheduler": entry_data["scheduler"].stats,
+            "cache": client.cache.stats,
+            "image_sensors": entry_data["image_sensors"].stats,
+            "chats": entry_data["chats"].stats,
+            "endpoints": {
+                "vision": client.vision_pool.stats,
+                "text": client.text_pool.stats if client.text_pool is not None else None,
+            },
+            "metrics": {
+                "requests": metrics.requests,
+                "errors": metrics.errors,
+                "last_error": metrics.last_error,
+                "requests_per_minute": metrics.requests_per_minute(),
+                "vision_tokens_per_second": metrics.tokens_per_second("vision"),
+                "text_tokens_per_second": metrics.tokens_per_second("text"),
+                "stages": metrics.stage_percentiles(),
+            },
+            "event_loop": entry_data["profiler"].report(),
+        },
+        TO_REDACT,
+    )
@@ -0,0 +1,148 @@
+"""Ollama endpoint pool with health checks and circuit breaking."""
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consecutive failures after which an endpoint is taken out of rotation
+FAILURE_THRESHOLD = 3
+
+# Seconds an endpoint stays out of rotation before it is tried again
+CIRCUIT_OPEN_SECONDS = 30
+
+# Seconds a health check may take
+HEALTH_CHECK_TIMEOUT = 5
+
+# Weight of the newest sample in the latency moving average
+LATENCY_SMOOTHING = 0.3
+
+
+def parse_endpoints(hosts: str, default_port) -> list:
+    """
+    Turn a comma separated list of hosts, each optionally with its own
+    ":port", into Ollama API base URLs. IPv6 addresses must be written in
+    brackets, as in "[fe80::1]:11434"; raise ValueError for a bare one.
+    """
+    urls = []
+    for host in str(hosts or "").split(","):
+        host = host.strip()
+        if not host:
+            continue
+        address = host.rsplit("]", 1)[-1]
+        if address.count(":") > 1:
+            raise ValueError(f"IPv6 address {host} must be written in brackets, as in [{host}]")
+        if ":" not in address:
+            host = f"{host}:{default_port}"
+        urls.append(f"http://{host}/api")
+    return urls
+
+
+class Endpoint:
+    """One Ollama server and its routing state."""
+
+    def __init__(self, api_base_url):
+        self.api_base_url = api_base_url
+        self.outstanding = 0
+        self.latency = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.healthy = True
+
+    @property
+    def available(self) -> bool:
+        """Whether requests may be routed here (circuit closed or half-open)."""
+        return self.healthy and self.open_until <= time.monotonic()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "url": self.api_base_url,
+            "healthy": self.healthy,
+            "circuit_open": self.open_until > time.monotonic(),
+            "outstanding": self.outstanding,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "failures": self.failures,
+        }
+
+
+class EndpointPool:
+    """
+    Route requests over several Ollama servers serving the same model.
+    The endpoint with the fewest outstanding requests wins, ties broken by
+    the lowest average time to first byte. Endpoints failing
+    FAILURE_THRESHOLD times in a row are skipped for CIRCUIT_OPEN_SECONDS.
+    """
+
+    def __init__(self, api_base_urls):
+        self.endpoints = [Endpoint(url) for url in api_base_urls]
+
+    def select(self, exclude=()):
+        """Return the best available endpoint not in exclude, or None."""
+        candidates = [
+            endpoint for endpoint in self.endpoints
+            if endpoint not in exclude and endpoint.available
+        ]
+        if not candidates:
+            # Everything is down; try the least recently failed before giving up
+            candidates = [
+                endpoint for endpoint in self.endpoints if endpoint not in exclude
+            ]
+            if not candidates:
+                return None
+            return min(candidates, key=lambda endpoint: endpoint.open_until)
+        return min(
+            candidates,
+            key=lambda endpoint: (endpoint.outstanding, endpoint.latency or 0.0),
+        )
+
+    def record_success(self, endpoint, latency):
+        """Fold a successful request's time to first byte into the endpoint state."""
+        endpoint.failures = 0
+        endpoint.open_until = 0.0
+        endpoint.healthy = True
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency += LATENCY_SMOOTHING * (latency - endpoint.latency)
+
+    def record_failure(self, endpoint):
+        """Count a failed request, opening the circuit after repeated failures."""
+        endpoint.failures += 1
+        if endpoint.failures >= FAILURE_THRESHOLD:
+            if endpoint.open_until <= time.monotonic():
+                _LOGGER.warning(
+                    "Ollama endpoint %s failed %d times, taking it out of rotation",
+                    endpoint.api_base_url, endpoint.failures,
+                )
+            endpoint.open_until = time.monotonic() + CIRCUIT_OPEN_SECONDS
+
+    async def async_check_health(self, session: aiohttp.ClientSession):
+        """Probe /api/version on every endpoint and update their health."""
+        await asyncio.gather(
+            *(self._async_check_endpoint(session, endpoint) for endpoint in self.endpoints)
+        )
+
+    async def _async_check_endpoint(self, session, endpoint):
+        try:
+            async with session.get(
+                f"{endpoint.api_base_url}/version",
+                timeout=aiohttp.ClientTimeout(total=HEALTH_CHECK_TIMEOUT),
+            ) as resp:
+                healthy = resp.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            healthy = False
+
+        if healthy and not endpoint.healthy:
+            _LOGGER.info("Ollama endpoint %s is back", endpoint.api_base_url)
+            endpoint.failures = 0
+            endpoint.open_until = 0.0
+        elif not healthy and endpoint.healthy:
+            _LOGGER.warning("Ollama endpoint %s failed its health check", endpoint.api_base_url)
+        endpoint.healthy = healthy
+
+    @property
+    def stats(self) -> list:
+        return [endpoint.stats for endpoint in self.endpoints]
@@ -0,0 +1,104 @@
+"""On-disk history of analysis results for Ollama Vision."""
+import hashlib
+import logging
+from collections import OrderedDict, deque
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Seconds to collect new results before they are written to disk
+SAVE_DELAY = 30
+
+# Longest description kept per result, in characters
+MAX_TEXT_LENGTH = 2000
+
+
+def prompt_hash(prompt) -> str:
+    """Short stable hash identifying a prompt without storing it."""
+    if prompt is None:
+        return None
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+async def async_remove_history(hass: HomeAssistant, entry_id):
+    """Delete the stored history of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.history.{entry_id}").async_remove()
+
+
+class ResultHistory:
+    """
+    The last max_results results of each image name of one config entry,
+    kept for at most max_images image names (least recently updated evicted
+    first) and persisted in .storage. A max_results of 0 disables history.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id, max_results, max_images):
+        self.max_results = max_results
+        self.max_images = max_images
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.history.{entry_id}")
+        self._results = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are recorded at all."""
+        return self.max_results > 0
+
+    async def async_load(self):
+        """Load the stored history."""
+        if not self.enabled:
+            return
+        data = await self._store.async_load() or {}
+        for image_name, results in data.get("results", {}).items():
+            self._results[image_name] = deque(results, maxlen=self.max_results)
+        self._async_trim()
+
+    async def async_save(self):
+        """Write the history to disk right away."""
+        if self.enabled:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_add(self, image_name, result: dict):
+        """Record a result of image_name and schedule a write."""
+        if not self.enabled:
+            return
+        for key in ("description", "final_description"):
+            if result.get(key):
+                result[key] = result[key][:MAX_TEXT_LENGTH]
+
+        results = self._results.pop(image_name, None)
+        if results is None:
+            results = deque(maxlen=self.max_results)
+        results.append(result)
+        self._results[image_name] = results
+        self._async_trim()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def get(self, image_name, limit=None) -> list:
+        """Return the results of image_name, newest first."""
+        results = list(reversed(self._results.get(image_name, ())))
+        return results[:limit] if limit else results
+
+    @property
+    def image_names(self) -> list:
+        """Image names with recorded results."""
+        return list(self._results)
+
+    @callback
+    def _async_trim(self):
+        while len(self._results) > self.max_images:
+            self._results.popitem(last=False)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "results": {
+                image_name: list(results) for image_name, results in self._results.items()
+            }
+        }
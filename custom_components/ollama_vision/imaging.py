@@ -0,0 +1,154 @@
+"""Image helpers for Ollama Vision.
+
+Functions that decode or encode pixel data are blocking and must run in an
+executor thread.
+"""
+import io
+import logging
+import os
+
+from PIL import Image, ImageOps
+
+from homeassistant.exceptions import ServiceValidationError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Width and height of the grid used for the difference hash (64 bits)
+HASH_SIZE = 8
+
+
+def perceptual_hash(image_data: bytes) -> int:
+    """
+    Compute a 64-bit difference hash (dHash) of an image.
+    The image is shrunk to a 9x8 grayscale grid and each bit records whether
+    a pixel is brighter than its right neighbour, so small noise and
+    recompression barely change the hash while scene changes do.
+    """
+    with Image.open(io.BytesIO(image_data)) as image:
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        pixels = list(
+            image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata()
+        )
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(first ^ second).count("1")
+
+
+def read_image_file(path: str, max_bytes: int) -> bytearray:
+    """
+    Read a local image file into a single buffer.
+    Raise ValueError if the file is larger than max_bytes.
+    """
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if max_bytes and size > max_bytes:
+            raise ValueError(f"{path} is {size} bytes, more than the limit of {max_bytes}")
+        buffer = bytearray(size)
+        read = file.readinto(buffer)
+    del buffer[read:]
+    return buffer
+
+
+def parse_crop_box(text: str) -> tuple:
+    """
+    Parse a "left,top,right,bottom" crop box. Raise ValueError if it is
+    malformed or empty.
+    """
+    left, top, right, bottom = (float(value) for value in text.split(","))
+    if right <= left or bottom <= top:
+        raise ValueError("empty box")
+    return (left, top, right, bottom)
+
+
+def parse_crop_regions(text: str) -> dict:
+    """
+    Parse crop regions configured as one
+    "image_name: left,top,right,bottom; left,top,right,bottom" line per image
+    name. Boxes are in pixels of the original image, or fractions of its size
+    when no value exceeds 1.
+    Return a dict of image_name to a list of box tuples. Invalid lines are
+    skipped.
+    """
+    regions = {}
+    for line in (text or "").splitlines():
+        if not line.strip():
+            continue
+        name, sep, boxes = line.partition(":")
+        try:
+            if not sep:
+                raise ValueError("missing ':'")
+            parsed = [parse_crop_box(box) for box in boxes.split(";") if box.strip()]
+            if not parsed:
+                raise ValueError("no box")
+        except ValueError as exc:
+            _LOGGER.warning("Ignoring invalid crop region %r: %s", line, exc)
+            continue
+        regions[name.strip()] = parsed
+    return regions
+
+
+def crop_pixels(crop, width, height) -> tuple:
+    """
+    Convert a crop box to whole pixels within a width x height image. A box
+    whose values are all at most 1 is taken as fractions of the image size.
+    Raise ServiceValidationError if nothing of the box lies within the image.
+    """
+    left, top, right, bottom = crop
+    if max(crop) <= 1:
+        left, right = left * width, right * width
+        top, bottom = top * height, bottom * height
+    box = (
+        max(0, min(round(left), width)),
+        max(0, min(round(top), height)),
+        max(0, min(round(right), width)),
+        max(0, min(round(bottom), height)),
+    )
+    if box[2] <= box[0] or box[3] <= box[1]:
+        raise ServiceValidationError(
+            f"Crop box {list(crop)} leaves nothing of the {width}x{height} image"
+        )
+    return box
+
+
+def prepare_image(image_data: bytes, max_dimension: int, jpeg_quality: int, crop=None) -> bytes:
+    """
+    Crop, downscale and recompress an image before it is sent to Ollama.
+    The image is turned upright according to its EXIF orientation, which
+    re-encoding drops, cropped to crop (left, top, right, bottom, see
+    crop_pixels, in the upright image) if given, shrunk so its longest side
+    is at most max_dimension (0 keeps the size) and re-encoded as JPEG. The
+    original bytes are returned when nothing needs to change or re-encoding
+    would not make the image smaller.
+    """
+    with Image.open(io.BytesIO(image_data)) as image:
+        width, height = image.size
+        needs_resize = max_dimension > 0 and max(width, height) > max_dimension
+        if crop is None and not needs_resize:
+            return image_data
+
+        if crop is None:
+            # Let the JPEG decoder skip detail we are about to throw away
+            image.draft("RGB", (max_dimension, max_dimension))
+        processed = ImageOps.exif_transpose(image).convert("RGB")
+        if crop is not None:
+            processed = processed.crop(crop_pixels(crop, *processed.size))
+
+        if max_dimension > 0:
+            processed.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        output = io.BytesIO()
+        processed.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+
+    result = output.getvalue()
+    if crop is None and len(result) >= len(image_data):
+        return image_data
+    return result
@@ -0,0 +1,116 @@
+"""Rolling pipeline metrics for Ollama Vision."""
+import math
+import time
+from collections import deque
+
+# Number of recent analyses the percentiles are computed over
+METRICS_WINDOW = 500
+
+# Ollama reports durations in nanoseconds
+NANOSECONDS = 1_000_000_000
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def ollama_timings(prefix, stats) -> dict:
+    """
+    Convert Ollama's nanosecond timings for one model call into stage
+    durations in seconds, named prefix_load, prefix_prompt_eval and
+    prefix_generation.
+    """
+    timings = {}
+    for field, stage in (
+        ("load_duration", "load"),
+        ("prompt_eval_duration", "prompt_eval"),
+        ("eval_duration", "generation"),
+    ):
+        if field in stats:
+            timings[f"{prefix}_{stage}"] = stats[field] / NANOSECONDS
+    return timings
+
+
+def merge_ollama_stats(stats_list) -> dict:
+    """
+    Combine Ollama's stats of model calls that ran at the same time. Token
+    counts are summed; durations are those of the slowest call, which bounds
+    the wall time.
+    """
+    slowest = max(stats_list, key=lambda stats: stats.get("total_duration", 0), default={})
+    merged = {field: value for field, value in slowest.items() if field.endswith("_duration")}
+    for field in ("prompt_eval_count", "eval_count"):
+        counts = [stats[field] for stats in stats_list if field in stats]
+        if counts:
+            merged[field] = sum(counts)
+    return merged
+
+
+class PipelineMetrics:
+    """
+    Per-stage latencies, token rates and error counts of the last
+    METRICS_WINDOW analyses of one config entry.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._completed_at = deque(maxlen=window)
+        self._token_rates = {"vision": deque(maxlen=window), "text": deque(maxlen=window)}
+        self.requests = 0
+        self.errors = 0
+        self.last_error = None
+
+    def record(self, timings: dict, vision_stats=None, text_stats=None):
+        """Record the stage timings (seconds) of a finished analysis."""
+        self.requests += 1
+        self._samples.append(timings)
+        self._completed_at.append(time.monotonic())
+        for stage, stats in (("vision", vision_stats), ("text", text_stats)):
+            if stats and stats.get("eval_duration") and stats.get("eval_count"):
+                self._token_rates[stage].append(
+                    stats["eval_count"] * NANOSECONDS / stats["eval_duration"]
+                )
+
+    def record_error(self, error):
+        """Record a failed analysis."""
+        self.requests += 1
+        self.errors += 1
+        self.last_error = str(error)
+
+    def stage_percentiles(self) -> dict:
+        """Return {stage: {"p50", "p95", "p99"}} over the window, in seconds."""
+        values = {}
+        for sample in self._samples:
+            for stage, duration in sample.items():
+                values.setdefault(stage, []).append(duration)
+        result = {}
+        for stage, durations in values.items():
+            durations.sort()
+            result[stage] = {
+                "p50": round(percentile(durations, 0.50), 3),
+                "p95": round(percentile(durations, 0.95), 3),
+                "p99": round(percentile(durations, 0.99), 3),
+            }
+        return result
+
+    def total_percentile(self, fraction):
+        """Percentile of the end-to-end latency, or None without samples."""
+        totals = sorted(sample["total"] for sample in self._samples if "total" in sample)
+        value = percentile(totals, fraction)
+        return round(value, 3) if value is not None else None
+
+    def requests_per_minute(self) -> int:
+        """Number of analyses completed during the last minute."""
+        cutoff = time.monotonic() - 60
+        return sum(1 for completed in self._completed_at if completed >= cutoff)
+
+    def tokens_per_second(self, stage):
+        """Average generation speed of a model over the window."""
+        rates = self._token_rates[stage]
+        if not rates:
+            return None
+        return round(sum(rates) / len(rates), 1)
@@ -0,0 +1,202 @@
+"""Opt-in event loop diagnostics for Ollama Vision.
+
+Times the synchronous sections of the analysis pipeline, watches the event
+loop from a separate thread and captures its stack when it stalls, and can
+sample the loop's stack over a number of analyses. Everything is a no-op
+unless enabled.
+"""
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of slowest section runs kept, with their stacks
+WORST_SECTIONS = 10
+
+# Number of loop stalls kept, with the stack of the loop when detected
+MAX_STALLS = 20
+
+# Seconds the loop may be unresponsive before it counts as a stall
+STALL_THRESHOLD = 0.1
+
+# Seconds between loop heartbeats and between watchdog checks
+HEARTBEAT_INTERVAL = 0.02
+WATCH_INTERVAL = 0.05
+
+# Seconds between stack samples while profiling
+SAMPLE_INTERVAL = 0.005
+
+# Frames kept per stack, and functions listed in the profile
+STACK_LIMIT = 12
+TOP_FUNCTIONS = 25
+
+_NO_SECTION = nullcontext()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_filename.rsplit('/', 2)[-1]}:{code.co_name}"
+
+
+class PipelineProfiler:
+    """
+    Event loop diagnostics of one config entry. section() times synchronous
+    code on the loop; async_start() runs a watchdog thread that records loop
+    stalls and, for the next profile_requests analyses, samples the stack of
+    the loop thread every SAMPLE_INTERVAL seconds.
+    """
+
+    def __init__(self, enabled=False, profile_requests=0):
+        self.enabled = enabled
+        self.profile_remaining = profile_requests if enabled else 0
+        self._lock = threading.Lock()
+        self._sections = {}
+        self._worst = []
+        self._order = itertools.count()
+        self._stalls = deque(maxlen=MAX_STALLS)
+        self._max_lag = 0.0
+        self._samples = 0
+        self._self_counts = Counter()
+        self._cumulative_counts = Counter()
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat = 0.0
+        self._heartbeat_handle = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def section(self, name):
+        """Context manager timing a synchronous section of the pipeline."""
+        if not self.enabled:
+            return _NO_SECTION
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                stats = self._sections.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+                stats["count"] += 1
+                stats["total"] += duration
+                stats["max"] = max(stats["max"], duration)
+                if len(self._worst) < WORST_SECTIONS or duration > self._worst[0][0]:
+                    # Frame 2 is the code using the with statement
+                    offender = {
+                        "section": name,
+                        "duration_ms": round(duration * 1000, 3),
+                        "at": time.time(),
+                        "stack": traceback.format_stack(sys._getframe(2), STACK_LIMIT),
+                    }
+                    item = (duration, next(self._order), offender)
+                    if len(self._worst) < WORST_SECTIONS:
+                        heapq.heappush(self._worst, item)
+                    else:
+                        heapq.heapreplace(self._worst, item)
+
+    def async_start(self, loop):
+        """Start the heartbeat on loop and the watchdog thread. Call from the loop."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._beat()
+        self._thread = threading.Thread(
+            target=self._watch, name="ollama_vision_watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def async_stop(self):
+        """Stop the heartbeat and the watchdog thread. Call from the loop."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._heartbeat_handle is not None:
+            self._heartbeat_handle.cancel()
+        self._thread = None
+
+    def async_request_done(self):
+        """Count a finished analysis towards the number to profile."""
+        if self.profile_remaining > 0:
+            self.profile_remaining -= 1
+            if self.profile_remaining == 0:
+                _LOGGER.info("Ollama Vision profile complete, download the diagnostics to see it")
+
+    def _beat(self):
+        self._heartbeat = time.monotonic()
+        self._heartbeat_handle = self._loop.call_later(HEARTBEAT_INTERVAL, self._beat)
+
+    def _watch(self):
+        """Watchdog thread: detect stalls and sample the loop's stack."""
+        stall = None
+        while not self._stop.wait(SAMPLE_INTERVAL if self.profile_remaining > 0 else WATCH_INTERVAL):
+            lag = time.monotonic() - self._heartbeat - HEARTBEAT_INTERVAL
+            frame = sys._current_frames().get(self._loop_thread_id)
+            with self._lock:
+                self._max_lag = max(self._max_lag, lag)
+                if lag > STALL_THRESHOLD:
+                    if stall is None:
+                        stall = {
+                            "at": time.time(),
+                            "lag_ms": round(lag * 1000, 1),
+                            "stack": traceback.format_stack(frame, STACK_LIMIT) if frame else [],
+                        }
+                        self._stalls.append(stall)
+                    else:
+                        stall["lag_ms"] = round(lag * 1000, 1)
+                else:
+                    stall = None
+
+                if self.profile_remaining > 0 and frame is not None:
+                    self._sample(frame)
+            del frame
+
+    def _sample(self, frame):
+        self._samples += 1
+        self._self_counts[_frame_name(frame)] += 1
+        seen = set()
+        while frame is not None:
+            name = _frame_name(frame)
+            if name not in seen:
+                seen.add(name)
+                self._cumulative_counts[name] += 1
+            frame = frame.f_back
+
+    def report(self) -> dict:
+        """Return everything recorded, for the diagnostics download."""
+        with self._lock:
+            sections = {
+                name: {
+                    "count": stats["count"],
+                    "total_ms": round(stats["total"] * 1000, 3),
+                    "average_ms": round(stats["total"] * 1000 / stats["count"], 3),
+                    "max_ms": round(stats["max"] * 1000, 3),
+                }
+                for name, stats in self._sections.items()
+            }
+            worst = [offender for _, _, offender in sorted(self._worst, reverse=True)]
+            return {
+                "enabled": self.enabled,
+                "sections": sections,
+                "worst_sections": worst,
+                "max_loop_lag_ms": round(max(0.0, self._max_lag) * 1000, 1),
+                "loop_stalls": list(self._stalls),
+                "profile": {
+                    "analyses_remaining": self.profile_remaining,
+                    "samples": self._samples,
+                    "sample_interval_ms": SAMPLE_INTERVAL * 1000,
+                    "self": self._self_counts.most_common(TOP_FUNCTIONS),
+                    "cumulative": self._cumulative_counts.most_common(TOP_FUNCTIONS),
+                },
+            }
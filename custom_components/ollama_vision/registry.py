@@ -0,0 +1,149 @@
+"""Bounded registry of the per-image sensors of Ollama Vision."""
+import logging
+import time
+from collections import OrderedDict
+
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.entity_registry as er
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# unique_id suffixes of the sensors every config entry has, next to its image
+# sensors; the metrics ones are prefixed so they cannot clash with an image name
+ENTRY_SENSOR_KEYS = (
+    "vision_info", "text_info", "metrics_latency", "metrics_throughput", "metrics_errors",
+)
+
+
+class ImageSensorRegistry:
+    """
+    Latest result and sensor entity of every image name analyzed by one
+    config entry. At most max_entries image names are kept, evicting the
+    least recently updated first; names not updated for idle_ttl seconds
+    expire (0 disables expiry). Evicted sensors are removed from the entity
+    registry, so they disappear from Home Assistant.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id, max_entries, idle_ttl):
+        self.hass = hass
+        self.entry_id = entry_id
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, image_name) -> dict:
+        """Return the sensor data of image_name, or an empty dict."""
+        entry = self._entries.get(image_name)
+        return entry["data"] if entry is not None else {}
+
+    def entity(self, image_name):
+        """Return the sensor entity of image_name, or None if not created yet."""
+        entry = self._entries.get(image_name)
+        return entry["entity"] if entry is not None else None
+
+    @callback
+    def async_set(self, image_name, data: dict, merge=False) -> dict:
+        """
+        Store new sensor data for image_name, replacing or merging into the
+        old. Return the stored data.
+        """
+        entry = self._entries.pop(image_name, None)
+        if entry is None:
+            entry = {"data": {}, "entity": None}
+        if merge:
+            entry["data"].update(data)
+        else:
+            entry["data"] = data
+        entry["updated"] = time.monotonic()
+        self._entries[image_name] = entry
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            _LOGGER.debug("Too many image sensors, evicting %s", oldest)
+            self._async_evict(oldest)
+        return entry["data"]
+
+    @callback
+    def async_set_entity(self, image_name, entity):
+        """Remember the sensor entity created for image_name."""
+        entry = self._entries.get(image_name)
+        if entry is not None:
+            entry["entity"] = entity
+
+    @callback
+    def async_expire(self, now=None) -> int:
+        """Evict image names idle for longer than idle_ttl. Return how many."""
+        if self.idle_ttl <= 0:
+            return 0
+        return self.async_purge(self.idle_ttl)
+
+    @callback
+    def async_purge(self, max_age=0) -> int:
+        """Evict image names not updated for max_age seconds. Return how many."""
+        cutoff = time.monotonic() - max_age
+        stale = [
+            image_name for image_name, entry in self._entries.items()
+            if entry["updated"] <= cutoff
+        ]
+        for image_name in stale:
+            self._async_evict(image_name)
+        return len(stale)
+
+    @callback
+    def async_purge_orphans(self) -> int:
+        """
+        Remove image sensors left in the entity registry by earlier runs that
+        are not tracked any more. Return how many were removed.
+        """
+        ent_registry = er.async_get(self.hass)
+        prefix = f"{DOMAIN}_{self.entry_id}_"
+        keep = {f"{prefix}{key}" for key in ENTRY_SENSOR_KEYS}
+        keep.update(f"{prefix}{image_name}" for image_name in self._entries)
+        orphans = [
+            entity_entry.entity_id
+            for entity_entry in er.async_entries_for_config_entry(ent_registry, self.entry_id)
+            if entity_entry.domain == "sensor"
+            and entity_entry.unique_id.startswith(prefix)
+            and entity_entry.unique_id not in keep
+        ]
+        for entity_id in orphans:
+            ent_registry.async_remove(entity_id)
+        return len(orphans)
+
+    @callback
+    def async_clear(self):
+        """Forget all image names without touching their entities."""
+        self._entries.clear()
+
+    @callback
+    def async_remove_entity(self, entity):
+        """Remove an evicted sensor entity from Home Assistant."""
+        ent_registry = er.async_get(self.hass)
+        if ent_registry.async_get(entity.entity_id) is not None:
+            ent_registry.async_remove(entity.entity_id)
+        else:
+            self.hass.async_create_task(entity.async_remove())
+
+    @callback
+    def _async_evict(self, image_name):
+        entry = self._entries.pop(image_name)
+        self.evictions += 1
+        entity = entry["entity"]
+        if entity is None:
+            return
+        if entity.entity_id is None:
+            # Still being added; it removes itself once it has been
+            entity.evicted = True
+            return
+        self.async_remove_entity(entity)
+
+    @property
+    def stats(self) -> dict:
+        """Registry statistics suitable for sensor attributes."""
+        return {
+            "image_sensors": len(self._entries),
+            "image_sensor_evictions": self.evictions,
+        }
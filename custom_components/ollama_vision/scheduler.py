@@ -0,0 +1,203 @@
+"""Bounded request scheduler for Ollama Vision."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AnalysisDropped(HomeAssistantError):
+    """Raised for a queued request that was dropped before it could run."""
+
+
+class _Job:
+    """A queued or running unit of work."""
+
+    def __init__(self, key, job_factory, future):
+        self.key = key
+        self.job_factory = job_factory
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.task = None
+        # The queued job this one replaced, whose callers receive our result
+        self.replaced = None
+
+
+class AnalysisScheduler:
+    """
+    Run at most max_in_flight jobs at once for one config entry.
+    Jobs waiting for a free slot are queued per key (the image_name). A newer
+    job for a key that is still queued replaces the stale one in place, so the
+    newest frame wins and callers of the stale job receive the newer result.
+    If the newer job is withdrawn by its caller, the stale job takes its
+    place again. When the queue is full the oldest queued job is dropped.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_in_flight: int, max_queue: int):
+        self.hass = hass
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._queue = OrderedDict()
+        self._running = set()
+        self.replaced = 0
+        self.dropped = 0
+        self.started = 0
+        self.last_wait = None
+        self._total_wait = 0.0
+        self._shutting_down = False
+
+    @callback
+    def async_submit(self, key, job_factory) -> asyncio.Future:
+        """
+        Queue job_factory (a coroutine function) under key.
+        Return a future resolving to the job's result.
+        """
+        future = self.hass.loop.create_future()
+        job = _Job(key, job_factory, future)
+        future.add_done_callback(partial(self._async_future_done, job))
+
+        stale = self._queue.get(key)
+        if stale is not None:
+            # Replace the stale frame but keep its place in the queue
+            self.replaced += 1
+            self._queue[key] = job
+            job.replaced = stale
+            future.add_done_callback(partial(_chain_future, stale.future))
+            _LOGGER.debug("Replaced queued request for %s with a newer one", key)
+        else:
+            if len(self._queue) >= self.max_queue:
+                _, oldest = self._queue.popitem(last=False)
+                self.dropped += 1
+                _LOGGER.warning(
+                    "Request queue full, dropping queued request for %s", oldest.key
+                )
+                if not oldest.future.done():
+                    oldest.future.set_exception(
+                        AnalysisDropped(f"Request for {oldest.key} dropped, queue full")
+                    )
+            self._queue[key] = job
+
+        self._async_start_next()
+        return future
+
+    @callback
+    def _async_start_next(self):
+        """Start queued jobs while there are free slots."""
+        while self._queue and len(self._running) < self.max_in_flight:
+            _, job = self._queue.popitem(last=False)
+            wait = time.monotonic() - job.enqueued_at
+            self.last_wait = wait
+            self._total_wait += wait
+            self.started += 1
+
+            job.task = self.hass.async_create_task(job.job_factory())
+            self._running.add(job)
+            job.task.add_done_callback(partial(self._async_task_done, job))
+
+    @callback
+    def _async_task_done(self, job, task):
+        """Hand the result of a finished job to its callers and start the next one."""
+        self._running.discard(job)
+        if not job.future.done():
+            if task.cancelled():
+                job.future.cancel()
+            elif task.exception() is not None:
+                job.future.set_exception(task.exception())
+            else:
+                job.future.set_result(task.result())
+        self._async_start_next()
+
+    @callback
+    def _async_future_done(self, job, future):
+        """Withdraw a job whose caller cancelled it."""
+        if not future.cancelled():
+            return
+        stale = job.replaced
+        while stale is not None and stale.future.done():
+            stale = stale.replaced
+
+        if self._shutting_down:
+            if stale is not None:
+                stale.future.cancel()
+            return
+
+        if self._queue.get(job.key) is job:
+            if stale is not None:
+                # The stale job takes back its place in the queue
+                _LOGGER.debug("Newer request for %s withdrawn, restoring the queued one", job.key)
+                self._queue[job.key] = stale
+            else:
+                self._queue.pop(job.key)
+            return
+
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+        if stale is not None:
+            self._async_requeue(stale)
+
+    @callback
+    def _async_requeue(self, job):
+        """Queue job again after the job that replaced it was withdrawn while running."""
+        queued = self._queue.get(job.key)
+        if queued is None:
+            self._queue[job.key] = job
+            self._async_start_next()
+            return
+        # A newer frame is already queued; job's callers receive its result
+        tail = queued
+        while tail.replaced is not None:
+            tail = tail.replaced
+        tail.replaced = job
+        queued.future.add_done_callback(partial(_chain_future, job.future))
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free slot."""
+        return len(self._queue)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently running."""
+        return len(self._running)
+
+    @property
+    def stats(self) -> dict:
+        """Scheduler statistics suitable for sensor attributes."""
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "last_queue_wait": round(self.last_wait, 3) if self.last_wait is not None else None,
+            "average_queue_wait": round(self._total_wait / self.started, 3) if self.started else None,
+            "replaced_requests": self.replaced,
+            "dropped_requests": self.dropped,
+        }
+
+    @callback
+    def async_shutdown(self):
+        """Cancel all queued and running jobs."""
+        self._shutting_down = True
+        while self._queue:
+            _, job = self._queue.popitem(last=False)
+            job.future.cancel()
+        for job in list(self._running):
+            job.task.cancel()
+
+
+def _chain_future(target, source):
+    """
+    Copy the outcome of source onto target if target is still pending. A
+    cancelled source is left to _async_future_done, which requeues target.
+    """
+    if target.done() or source.cancelled():
+        return
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
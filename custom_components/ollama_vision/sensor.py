@@ -1,7 +1,9 @@
 """Sensor platform for Ollama Vision."""
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import MATCH_ALL, EntityCategory, UnitOfTime
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
@@ -12,7 +14,9 @@ from .const import (
     CONF_TEXT_MODEL,
     CONF_MODEL,
     CONF_HOST,
+    CONF_INCLUDE_PROMPTS,
     INTEGRATION_NAME,
+    SIGNAL_IMAGE_SENSOR_UPDATED,
 )
 
 async def async_setup_entry(
@@ -21,7 +25,12 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Ollama Vision sensors."""
-    entities = [OllamaVisionInfoSensor(hass, entry)]
+    entities = [
+        OllamaVisionInfoSensor(hass, entry),
+        OllamaVisionLatencySensor(hass, entry),
+        OllamaVisionThroughputSensor(hass, entry),
+        OllamaVisionErrorSensor(hass, entry),
+    ]
 
     text_model_enabled = entry.options.get(
         CONF_TEXT_MODEL_ENABLED, 
@@ -33,27 +42,32 @@ async def async_setup_entry(
     async_add_entities(entities, True)
 
     @callback
-    def async_create_sensor_from_event(event):
-        entry_id = event.data.get("entry_id")
-        image_name = event.data.get("image_name")
-        sensor_unique_id = f"{DOMAIN}_{entry_id}_{image_name}"
-        
-        # Initialize or get the dict to track created sensors
-        created_sensors = hass.data[DOMAIN].setdefault("created_sensors", {})
-        
-        if sensor_unique_id in created_sensors:
-            # Sensor already exists: trigger a direct update
-            created_sensors[sensor_unique_id].async_schedule_update()
+    def async_handle_image_result(image_name, sensor_data):
+        # Image sensors of this entry, bounded in number and idle time
+        image_sensors = hass.data[DOMAIN][entry.entry_id]["image_sensors"]
+        sensor = image_sensors.entity(image_name)
+
+        if sensor is not None:
+            # Sensor already exists: hand it the new result directly
+            sensor.async_handle_result(sensor_data)
         else:
             # Create and register a new sensor entity
-            sensor = OllamaVisionImageSensor(hass, entry_id, image_name)
-            async_add_entities([sensor], True)
-            created_sensors[sensor_unique_id] = sensor
+            sensor = OllamaVisionImageSensor(hass, entry.entry_id, image_name)
+            sensor.async_apply(sensor_data)
+            async_add_entities([sensor])
+            image_sensors.async_set_entity(image_name, sensor)
 
-    hass.bus.async_listen(f"{DOMAIN}_create_sensor", async_create_sensor_from_event)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_IMAGE_SENSOR_UPDATED.format(entry.entry_id), async_handle_image_result
+        )
+    )
 
 
 class OllamaVisionInfoSensor(SensorEntity):
+    # Counters and endpoint latencies change on every poll; not worth recording
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
     def __init__(self, hass, entry):
         self.hass = hass
         self.entry = entry
@@ -64,12 +78,26 @@ class OllamaVisionInfoSensor(SensorEntity):
         self._attr_icon = "mdi:information-outline"
         self._attr_native_value = f"{config[CONF_MODEL]} @ {config[CONF_HOST]}"
 
+    @property
+    def extra_state_attributes(self):
+        """Expose request queue, result cache and chat session statistics."""
+        entry_data = self.hass.data[DOMAIN][self.entry.entry_id]
+        return {
+            **entry_data["scheduler"].stats,
+            **entry_data["client"].cache.stats,
+            **entry_data["image_sensors"].stats,
+            **entry_data["chats"].stats,
+            "endpoints": entry_data["client"].vision_pool.stats,
+        }
+
     @property
     def device_info(self):
         return self.hass.data[DOMAIN][self.entry.entry_id]["device_info"]
 
 
 class OllamaTextModelInfoSensor(SensorEntity):
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
     def __init__(self, hass, entry):
         self.hass = hass
         self.entry = entry
@@ -80,12 +108,108 @@ class OllamaTextModelInfoSensor(SensorEntity):
         self._attr_icon = "mdi:information-outline"
         self._attr_native_value = f"{config[CONF_TEXT_MODEL]} @ {config[CONF_TEXT_HOST]}"
 
+    @property
+    def extra_state_attributes(self):
+        """Expose the state of the text model endpoints."""
+        text_pool = self.hass.data[DOMAIN][self.entry.entry_id]["client"].text_pool
+        return {"endpoints": text_pool.stats if text_pool is not None else []}
+
+    @property
+    def device_info(self):
+        return self.hass.data[DOMAIN][self.entry.entry_id]["device_info"]
+
+
+class OllamaVisionLatencySensor(SensorEntity):
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    # The per-stage breakdown is large and changes on every poll
+    _unrecorded_attributes = frozenset({"stages"})
+
+    def __init__(self, hass, entry):
+        self.hass = hass
+        self.entry = entry
+        config = hass.data[DOMAIN][entry.entry_id]["config"]
+
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_metrics_latency"
+        self._attr_name = f"Analysis latency p95 {config['name']}"
+        self._attr_icon = "mdi:timer-outline"
+
+    async def async_update(self):
+        """Refresh the rolling end-to-end latency and per-stage percentiles."""
+        metrics = self.hass.data[DOMAIN][self.entry.entry_id]["metrics"]
+        self._attr_native_value = metrics.total_percentile(0.95)
+        self._attr_extra_state_attributes = {
+            "p50": metrics.total_percentile(0.50),
+            "p99": metrics.total_percentile(0.99),
+            "stages": metrics.stage_percentiles(),
+        }
+
+    @property
+    def device_info(self):
+        return self.hass.data[DOMAIN][self.entry.entry_id]["device_info"]
+
+
+class OllamaVisionThroughputSensor(SensorEntity):
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "requests/min"
+
+    def __init__(self, hass, entry):
+        self.hass = hass
+        self.entry = entry
+        config = hass.data[DOMAIN][entry.entry_id]["config"]
+
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_metrics_throughput"
+        self._attr_name = f"Analysis throughput {config['name']}"
+        self._attr_icon = "mdi:speedometer"
+
+    async def async_update(self):
+        """Refresh requests per minute and model token rates."""
+        metrics = self.hass.data[DOMAIN][self.entry.entry_id]["metrics"]
+        self._attr_native_value = metrics.requests_per_minute()
+        self._attr_extra_state_attributes = {
+            "vision_tokens_per_second": metrics.tokens_per_second("vision"),
+            "text_tokens_per_second": metrics.tokens_per_second("text"),
+            "total_requests": metrics.requests,
+        }
+
+    @property
+    def device_info(self):
+        return self.hass.data[DOMAIN][self.entry.entry_id]["device_info"]
+
+
+class OllamaVisionErrorSensor(SensorEntity):
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, hass, entry):
+        self.hass = hass
+        self.entry = entry
+        config = hass.data[DOMAIN][entry.entry_id]["config"]
+
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_metrics_errors"
+        self._attr_name = f"Analysis errors {config['name']}"
+        self._attr_icon = "mdi:alert-circle-outline"
+
+    async def async_update(self):
+        """Refresh the failed analysis count."""
+        metrics = self.hass.data[DOMAIN][self.entry.entry_id]["metrics"]
+        self._attr_native_value = metrics.errors
+        self._attr_extra_state_attributes = {"last_error": metrics.last_error}
+
     @property
     def device_info(self):
         return self.hass.data[DOMAIN][self.entry.entry_id]["device_info"]
 
 
 class OllamaVisionImageSensor(SensorEntity):
+    # Long texts stay available to automations but are kept out of the recorder
+    _unrecorded_attributes = frozenset(
+        {"image_url", "image_source", "prompt", "text_prompt", "final_description"}
+    )
+
     def __init__(self, hass, entry_id, image_name):
         self.hass = hass
         self.entry_id = entry_id
@@ -104,48 +228,61 @@ class OllamaVisionImageSensor(SensorEntity):
         self._attr_unique_id = f"{DOMAIN}_{entry_id}_{image_name}"
 
         self._attr_icon = "mdi:image-search"
+        # Results are pushed by the analysis pipeline
+        self._attr_should_poll = False
         self._attr_native_value = None
         self._attr_extra_state_attributes = {}
-    
+        # Set by the registry when evicted before the entity was added
+        self.evicted = False
+
+    async def async_added_to_hass(self):
+        """Remove the sensor right away if it was evicted while being added."""
+        if self.evicted:
+            self.hass.data[DOMAIN][self.entry_id]["image_sensors"].async_remove_entity(self)
+
     @callback
-    def async_schedule_update(self):
-        """Update the entity when new data is received."""
-        sensor_data = self.hass.data[DOMAIN]["pending_sensors"].get(self.entry_id, {}).get(self.image_name, {})
+    def async_handle_result(self, sensor_data):
+        """Show a new result pushed by the analysis pipeline."""
+        self.async_apply(sensor_data)
+        # Not added yet; the state is written once it is
+        if self.entity_id is not None:
+            self.async_write_ha_state()
+
+    @callback
+    def async_apply(self, sensor_data):
+        """Set the state and attributes from the sensor data of an analysis."""
         if sensor_data:
             description = sensor_data.get("description")
             self._attr_native_value = description[:255] if description else None
+            include_prompts = self.hass.data[DOMAIN][self.entry_id]["config"].get(
+                CONF_INCLUDE_PROMPTS, False
+            )
             attributes = {
                 "integration_id": self.entry_id,
                 "image_url": sensor_data.get("image_url"),
-                "prompt": sensor_data.get("prompt"),                
+                "image_source": sensor_data.get("image_source"),
+                "prompt_hash": sensor_data.get("prompt_hash"),
+                "reused": sensor_data.get("reused", False),
+                "partial": sensor_data.get("partial", False),
             }
+            if sensor_data.get("structured") is not None:
+                attributes["structured"] = sensor_data["structured"]
+            if include_prompts:
+                attributes["prompt"] = sensor_data.get("prompt")
             if sensor_data.get("used_text_model"):
                 attributes.update({
                     "used_text_model": True,
-                    "text_prompt": sensor_data.get("text_prompt"),
                     "final_description": sensor_data.get("final_description")
                 })
+                if include_prompts:
+                    attributes["text_prompt"] = sensor_data.get("text_prompt")
             self._attr_extra_state_attributes = attributes
-            self.async_write_ha_state()
 
     async def async_update(self):
         """Fetch new state data for the sensor."""
-        sensor_data = self.hass.data[DOMAIN]["pending_sensors"].get(self.entry_id, {}).get(self.image_name, {})
-        if sensor_data:
-            description = sensor_data.get("description")
-            self._attr_native_value = description[:255] if description else None
-            attributes = {
-                "integration_id": self.entry_id,
-                "image_url": sensor_data.get("image_url"),
-                "prompt": sensor_data.get("prompt")                
-            }
-            if sensor_data.get("used_text_model"):
-                attributes.update({
-                    "used_text_model": True,
-                    "text_prompt": sensor_data.get("text_prompt"),
-                    "final_description": sensor_data.get("final_description")                    
-                })
-            self._attr_extra_state_attributes = attributes
+        self.async_apply(
+            self.hass.data[DOMAIN][self.entry_id]["image_sensors"].get(self.image_name)
+        )
 
     @property
     def device_info(self):
@@ -0,0 +1,36 @@
+"""Load the integration modules that do not need Home Assistant."""
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+INTEGRATION_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "ollama_vision"
+
+
+def load_integration_module(name):
+    """
+    Import a module of the integration without running its package
+    __init__, which needs Home Assistant, as benchmarks/run.py does.
+    """
+    if "ollama_vision" not in sys.modules:
+        package = types.ModuleType("ollama_vision")
+        package.__path__ = [str(INTEGRATION_DIR)]
+        sys.modules["ollama_vision"] = package
+    return importlib.import_module(f"ollama_vision.{name}")
+
+
+class FakeClock:
+    """Stands in for the time module of a module under test, advanced by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def api():
+    return load_integration_module("api")
@@ -0,0 +1,191 @@
+"""Tests of the request body builder and the NDJSON response collector."""
+import asyncio
+import base64
+import json
+
+import pytest
+
+IMAGES = [b"\x89PNG first", b"\xff\xd8 second image", bytes(range(256)) * 1000]
+
+
+class FakeContent:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class FakeResponse:
+    """Stands in for an aiohttp response streaming the given body chunks."""
+
+    def __init__(self, chunks):
+        self.content = FakeContent(chunks)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def ndjson(*lines):
+    return b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+
+
+def tokens(*texts, done=True):
+    lines = [{"response": text, "done": False} for text in texts]
+    if done:
+        lines.append({"response": "", "done": True, "eval_count": len(texts)})
+    return ndjson(*lines)
+
+
+def collect(api, chunks, **kwargs):
+    client = api.OllamaClient("localhost", 11434, "vision", **kwargs)
+    response = FakeResponse(chunks)
+    stats = {}
+    text = asyncio.run(client._collect_ndjson(response, stats=stats))
+    return text, response, stats
+
+
+def split(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("count", [1, len(IMAGES)])
+def test_generate_body(api, count):
+    payload = {"model": "vision", "prompt": "Describe", "stream": True}
+    body = json.loads(api.build_generate_body(payload, IMAGES[:count]))
+    assert body == {
+        **payload,
+        "images": [base64.b64encode(image).decode() for image in IMAGES[:count]],
+    }
+
+
+@pytest.mark.parametrize("count", [1, len(IMAGES)])
+def test_generate_body_with_options(api, count):
+    payload = {
+        "model": "vision",
+        "prompt": "Describe",
+        "stream": True,
+        "format": {"type": "object", "properties": {"count": {"type": "integer"}}},
+        "options": {"stop": ["}", "\n\n"]},
+    }
+    body = json.loads(api.build_generate_body(payload, IMAGES[:count]))
+    assert body["options"] == payload["options"]
+    assert body["format"] == payload["format"]
+    assert body["images"] == [base64.b64encode(image).decode() for image in IMAGES[:count]]
+
+
+@pytest.mark.parametrize("count", [1, len(IMAGES)])
+def test_chat_body_puts_images_on_last_message(api, count):
+    messages = [
+        {"role": "system", "content": "Describe"},
+        {"role": "user", "content": "Earlier image."},
+        {"role": "assistant", "content": "A cat."},
+        {"role": "user", "content": "Here is the latest image."},
+    ]
+    payload = {
+        "model": "vision",
+        "messages": messages,
+        "stream": True,
+        "options": {"stop": ["END"]},
+    }
+    body = json.loads(api.build_generate_body(payload, IMAGES[:count]))
+    assert body["options"] == payload["options"]
+    assert body["messages"][:-1] == messages[:-1]
+    assert body["messages"][-1] == {
+        **messages[-1],
+        "images": [base64.b64encode(image).decode() for image in IMAGES[:count]],
+    }
+    assert "images" not in body
+
+
+def test_body_without_images(api):
+    payload = {"model": "text", "prompt": "Summarize", "stream": True}
+    assert json.loads(api.build_generate_body(payload, [])) == payload
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_ndjson_lines_split_across_chunks(api, size):
+    body = tokens("A", " red", " car", " parked.")
+    text, response, stats = collect(api, split(body, size))
+    assert text == "A red car parked."
+    assert stats["eval_count"] == 4
+    assert not response.closed
+
+
+def test_chat_ndjson_lines(api):
+    body = ndjson(
+        {"message": {"role": "assistant", "content": "Two"}, "done": False},
+        {"message": {"role": "assistant", "content": " dogs."}, "done": False},
+        {"message": {"role": "assistant", "content": ""}, "done": True},
+    )
+    text, _, _ = collect(api, split(body, 5))
+    assert text == "Two dogs."
+
+
+def test_last_line_without_newline(api):
+    body = tokens("A", " cat", done=False) + json.dumps({"response": ".", "done": True}).encode()
+    text, _, _ = collect(api, split(body, 4))
+    assert text == "A cat."
+
+
+def test_stop_sequence_split_across_tokens(api):
+    body = tokens("A person", " at the door. EN", "D and some", " more text")
+    text, response, stats = collect(api, [body], stop_sequences=["END"])
+    assert text == "A person at the door. "
+    assert response.closed
+    assert stats["stopped_early"] is True
+
+
+def test_stop_sequence_spanning_several_tokens(api):
+    body = tokens("Nothing new", "#", "#", "#", " ignored")
+    text, response, _ = collect(api, split(body, 2), stop_sequences=["###"])
+    assert text == "Nothing new"
+    assert response.closed
+
+
+def test_max_output_chars(api):
+    body = tokens("abcd", "efgh", "ijkl", "mnop")
+    text, response, stats = collect(api, [body], max_output_chars=10)
+    assert text == "abcdefghij"
+    assert response.closed
+    assert stats["stopped_early"] is True
+    assert "eval_count" not in stats
+
+
+def test_output_within_limits(api):
+    body = tokens("abcd", "efgh")
+    text, response, stats = collect(
+        api, [body], max_output_chars=100, stop_sequences=["END"]
+    )
+    assert text == "abcdefgh"
+    assert not response.closed
+    assert "stopped_early" not in stats
+
+
+@pytest.mark.parametrize(
+    ("text", "sequences"),
+    [
+        ("", []),
+        (None, []),
+        (".", ["."]),
+        ("END,###", ["END", "###"]),
+        ("END, ###", ["END", " ###"]),
+        (r"\n\n", ["\n\n"]),
+        (r"\n\n,END", ["\n\n", "END"]),
+        (r"\t,\r\n", ["\t", "\r\n"]),
+        (r"a\,b,\\", ["a,b", "\\"]),
+        (r"x\q", [r"x\q"]),
+        (",,END,", ["END"]),
+    ],
+)
+def test_parse_stop_sequences(api, text, sequences):
+    assert api.parse_stop_sequences(text) == sequences
+
+
+def test_newline_stop_sequence(api):
+    body = tokens("A cat.", "\n", "\nMore", " text")
+    text, response, _ = collect(api, [body], stop_sequences=api.parse_stop_sequences(r"\n\n"))
+    assert text == "A cat."
+    assert response.closed
@@ -0,0 +1,100 @@
+"""Tests of the result cache."""
+import pytest
+
+from conftest import FakeClock, load_integration_module
+
+cache_module = load_integration_module("cache")
+ResultCache = cache_module.ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_make_key_separates_parts():
+    assert ResultCache.make_key("ab", "c") != ResultCache.make_key("a", "bc")
+    assert ResultCache.make_key(b"image", "prompt") == ResultCache.make_key("image", "prompt")
+
+
+def test_disabled_cache(clock):
+    for cache in (ResultCache(0, 10, 1000), ResultCache(60, 0, 1000)):
+        assert not cache.enabled
+        cache.set("key", "value")
+        assert cache.get("key") is None
+        assert cache.stats["cache_entries"] == 0
+        assert cache.stats["cache_misses"] == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(60, 10, 1000)
+    cache.set("key", "value")
+    clock.now += 60
+    assert cache.get("key") == "value"
+    clock.now += 1
+    assert cache.get("key") is None
+    assert cache.stats == {
+        "cache_hits": 1,
+        "cache_misses": 1,
+        "cache_evictions": 0,
+        "cache_entries": 0,
+        "cache_bytes": 0,
+    }
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(60, 2, 1000)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats["cache_evictions"] == 1
+    assert cache.stats["cache_entries"] == 2
+
+
+def test_byte_budget_evicts_oldest(clock):
+    cache = ResultCache(60, 10, 10)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    assert cache.stats["cache_bytes"] == 8
+    cache.set("c", "cccc")
+    assert cache.get("a") is None
+    assert cache.stats["cache_bytes"] == 8
+    assert cache.stats["cache_evictions"] == 1
+
+
+def test_bytes_count_encoded_text(clock):
+    cache = ResultCache(60, 10, 10)
+    cache.set("a", "ééé")
+    assert cache.stats["cache_bytes"] == 6
+
+
+def test_value_larger_than_budget_is_not_cached(clock):
+    cache = ResultCache(60, 10, 10)
+    cache.set("a", "aaaa")
+    cache.set("big", "x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.stats["cache_evictions"] == 0
+
+
+def test_replacing_a_key_keeps_byte_count(clock):
+    cache = ResultCache(60, 10, 100)
+    cache.set("a", "aaaa")
+    cache.set("a", "aa")
+    assert cache.get("a") == "aa"
+    assert cache.stats["cache_bytes"] == 2
+    assert cache.stats["cache_entries"] == 1
+
+
+def test_clear(clock):
+    cache = ResultCache(60, 10, 100)
+    cache.set("a", "aaaa")
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats["cache_bytes"] == 0
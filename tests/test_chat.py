@@ -0,0 +1,111 @@
+"""Tests of the per-image chat sessions."""
+import pytest
+
+from conftest import FakeClock, load_integration_module
+
+chat = load_integration_module("chat")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(chat, "time", clock)
+    return clock
+
+
+def test_disabled_sessions():
+    sessions = chat.ChatSessions(False, 3, 0, 10)
+    assert sessions.get("vision", "cam", "Describe") is None
+
+
+def test_messages_carry_history(clock):
+    session = chat.ChatSessions(True, 3, 0, 10).get("vision", "cam", "Describe")
+    session.add_turn("Here is the latest image.", "A cat.")
+    assert session.messages("Here is the latest image.") == [
+        {"role": "system", "content": "Describe"},
+        {"role": "user", "content": "Here is the latest image."},
+        {"role": "assistant", "content": "A cat."},
+        {"role": "user", "content": "Here is the latest image."},
+    ]
+    assert session.history() == ["Here is the latest image.", "A cat."]
+
+
+def test_history_is_trimmed_to_max_turns(clock):
+    session = chat.ChatSessions(True, 2, 0, 10).get("vision", "cam", "Describe")
+    for index in range(4):
+        session.add_turn(f"image {index}", f"answer {index}")
+    assert session.history() == ["image 2", "answer 2", "image 3", "answer 3"]
+    assert len(session.messages("next")) == 1 + 2 * 2 + 1
+
+
+def test_no_history_kept_with_zero_turns(clock):
+    session = chat.ChatSessions(True, 0, 0, 10).get("vision", "cam", "Describe")
+    session.add_turn("image", "answer")
+    assert session.history() == []
+
+
+def test_same_session_per_stage_and_image_name(clock):
+    sessions = chat.ChatSessions(True, 3, 0, 10)
+    session = sessions.get("vision", "cam", "Describe")
+    assert sessions.get("vision", "cam", "Describe") is session
+    assert sessions.get("text", "cam", "Describe") is not session
+    assert sessions.get("vision", "door", "Describe") is not session
+    assert sessions.stats == {"chat_sessions": 3, "chat_resets": 0}
+
+
+def test_changed_prompt_starts_new_session(clock):
+    sessions = chat.ChatSessions(True, 3, 0, 10)
+    session = sessions.get("vision", "cam", "Describe")
+    session.add_turn("image", "answer")
+    renewed = sessions.get("vision", "cam", "Count the people")
+    assert renewed is not session
+    assert renewed.system == "Count the people"
+    assert renewed.history() == []
+    assert sessions.stats["chat_resets"] == 1
+
+
+def test_idle_session_starts_over(clock):
+    sessions = chat.ChatSessions(True, 3, 600, 10)
+    session = sessions.get("vision", "cam", "Describe")
+    session.add_turn("image", "answer")
+    clock.now += 600
+    assert sessions.get("vision", "cam", "Describe") is session
+    session.add_turn("image", "answer")
+    clock.now += 601
+    assert sessions.get("vision", "cam", "Describe") is not session
+    assert sessions.stats["chat_resets"] == 1
+
+
+def test_idle_reset_disabled(clock):
+    sessions = chat.ChatSessions(True, 3, 0, 10)
+    session = sessions.get("vision", "cam", "Describe")
+    clock.now += 365 * 24 * 3600
+    assert sessions.get("vision", "cam", "Describe") is session
+
+
+def test_least_recently_used_session_is_dropped(clock):
+    sessions = chat.ChatSessions(True, 3, 0, 2)
+    first = sessions.get("vision", "a", "Describe")
+    sessions.get("vision", "b", "Describe")
+    assert sessions.get("vision", "a", "Describe") is first
+    sessions.get("vision", "c", "Describe")
+    assert sessions.stats["chat_sessions"] == 2
+    assert sessions.get("vision", "a", "Describe") is first
+    assert sessions.stats["chat_resets"] == 0
+
+
+def test_reset(clock):
+    sessions = chat.ChatSessions(True, 3, 0, 10)
+    session = sessions.get("vision", "cam", "Describe")
+    sessions.get("text", "cam", "Summarize")
+    sessions.get("vision", "door", "Describe")
+    assert sessions.reset("cam") == 2
+    assert sessions.get("vision", "cam", "Describe") is not session
+    assert sessions.reset() == 2
+    assert sessions.stats == {"chat_sessions": 0, "chat_resets": 4}
+
+
+def test_text_system_prompt():
+    assert chat.text_system_prompt("Summarize {description} briefly") == (
+        f"Summarize {chat.CHAT_DESCRIPTION_REFERENCE} briefly"
+    )
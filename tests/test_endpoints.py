@@ -0,0 +1,126 @@
+"""Tests of the Ollama endpoint pool."""
+import pytest
+
+from conftest import FakeClock, load_integration_module
+
+endpoints = load_integration_module("endpoints")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(endpoints, "time", clock)
+    return clock
+
+
+@pytest.mark.parametrize(
+    ("hosts", "urls"),
+    [
+        ("ollama", ["http://ollama:11434/api"]),
+        ("gpu1, gpu2:11435", ["http://gpu1:11434/api", "http://gpu2:11435/api"]),
+        ("10.0.0.2,,  ", ["http://10.0.0.2:11434/api"]),
+        ("[fe80::1]", ["http://[fe80::1]:11434/api"]),
+        ("[fe80::1]:11435", ["http://[fe80::1]:11435/api"]),
+        ("", []),
+        (None, []),
+    ],
+)
+def test_parse_endpoints(hosts, urls):
+    assert endpoints.parse_endpoints(hosts, 11434) == urls
+
+
+@pytest.mark.parametrize("hosts", ["fe80::1", "gpu1, ::1", "fe80::1:11434"])
+def test_parse_endpoints_rejects_bare_ipv6(hosts):
+    with pytest.raises(ValueError, match="brackets"):
+        endpoints.parse_endpoints(hosts, 11434)
+
+
+def make_pool(count=3):
+    return endpoints.EndpointPool([f"http://gpu{index}:11434/api" for index in range(count)])
+
+
+def test_select_prefers_fewest_outstanding(clock):
+    pool = make_pool()
+    first, second, third = pool.endpoints
+    first.outstanding = 2
+    second.outstanding = 1
+    third.outstanding = 1
+    pool.record_success(second, 0.5)
+    pool.record_success(third, 0.2)
+    assert pool.select() is third
+    third.outstanding = 2
+    assert pool.select() is second
+
+
+def test_select_skips_tried_endpoints(clock):
+    pool = make_pool(2)
+    first, second = pool.endpoints
+    assert pool.select() is first
+    assert pool.select([first]) is second
+    assert pool.select([first, second]) is None
+
+
+def test_latency_is_smoothed(clock):
+    pool = make_pool(1)
+    endpoint = pool.endpoints[0]
+    pool.record_success(endpoint, 1.0)
+    pool.record_success(endpoint, 2.0)
+    assert endpoint.latency == pytest.approx(1.0 + endpoints.LATENCY_SMOOTHING)
+
+
+def test_circuit_opens_after_repeated_failures(clock):
+    pool = make_pool(2)
+    first, second = pool.endpoints
+    for _ in range(endpoints.FAILURE_THRESHOLD - 1):
+        pool.record_failure(first)
+    assert first.available
+    assert pool.select() is first
+
+    pool.record_failure(first)
+    assert not first.available
+    assert first.stats["circuit_open"] is True
+    assert pool.select() is second
+
+
+def test_circuit_half_opens_and_closes(clock):
+    pool = make_pool(2)
+    first, second = pool.endpoints
+    for _ in range(endpoints.FAILURE_THRESHOLD):
+        pool.record_failure(first)
+    second.outstanding = 1
+
+    # Half-open: after the open period the endpoint gets a trial request
+    clock.now += endpoints.CIRCUIT_OPEN_SECONDS
+    assert first.available
+    assert pool.select() is first
+
+    # A failed trial opens the circuit again right away
+    pool.record_failure(first)
+    assert not first.available
+
+    # A successful one closes it
+    clock.now += endpoints.CIRCUIT_OPEN_SECONDS
+    pool.record_success(first, 0.1)
+    assert first.failures == 0
+    assert first.available
+    pool.record_failure(first)
+    assert first.available
+
+
+def test_all_open_tries_least_recently_failed(clock):
+    pool = make_pool(2)
+    first, second = pool.endpoints
+    for _ in range(endpoints.FAILURE_THRESHOLD):
+        pool.record_failure(second)
+    clock.now += 1
+    for _ in range(endpoints.FAILURE_THRESHOLD):
+        pool.record_failure(first)
+    assert pool.select() is second
+    assert pool.select([second]) is first
+
+
+def test_unhealthy_endpoint_is_skipped(clock):
+    pool = make_pool(2)
+    first, second = pool.endpoints
+    first.healthy = False
+    assert pool.select() is second
@@ -0,0 +1,96 @@
+"""Tests of the image helpers."""
+import io
+
+import pytest
+
+pytest.importorskip("homeassistant")
+Image = pytest.importorskip("PIL.Image")
+
+from homeassistant.exceptions import ServiceValidationError  # noqa: E402
+
+from conftest import load_integration_module  # noqa: E402
+
+imaging = load_integration_module("imaging")
+
+# EXIF tag of the orientation; 6 means rotate 90 degrees clockwise to display
+ORIENTATION = 0x0112
+
+
+def jpeg(width, height, orientation=None, color=(200, 30, 30)):
+    image = Image.new("RGB", (width, height), color)
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[ORIENTATION] = orientation
+    output = io.BytesIO()
+    image.save(output, format="JPEG", exif=exif.tobytes())
+    return output.getvalue()
+
+
+def size_of(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_parse_crop_regions():
+    regions = imaging.parse_crop_regions(
+        "driveway: 0,0.5,0.5,1\n"
+        "\n"
+        "porch : 100,200,640,480; 0.5,0,1,0.5\n"
+    )
+    assert regions == {
+        "driveway": [(0.0, 0.5, 0.5, 1.0)],
+        "porch": [(100.0, 200.0, 640.0, 480.0), (0.5, 0.0, 1.0, 0.5)],
+    }
+
+
+@pytest.mark.parametrize(
+    "line",
+    ["no colon 0,0,1,1", "cam: 0,0,1", "cam: 0,0,a,1", "cam: 1,0,0,1", "cam: 0,0.5,1,0.5", "cam: ;"],
+)
+def test_parse_crop_regions_skips_invalid_lines(line):
+    assert imaging.parse_crop_regions(f"{line}\ngood: 0,0,1,1") == {"good": [(0.0, 0.0, 1.0, 1.0)]}
+
+
+def test_crop_pixels_in_pixels():
+    assert imaging.crop_pixels((100, 50, 300.4, 250.6), 640, 480) == (100, 50, 300, 251)
+
+
+def test_crop_pixels_in_fractions():
+    assert imaging.crop_pixels((0.25, 0.5, 0.75, 1), 640, 480) == (160, 240, 480, 480)
+
+
+def test_crop_pixels_clamps_to_image():
+    assert imaging.crop_pixels((600, 400, 2000, 2000), 640, 480) == (600, 400, 640, 480)
+
+
+@pytest.mark.parametrize("crop", [(700, 0, 900, 100), (0, 480, 640, 600), (10, 10, 10.2, 300)])
+def test_crop_pixels_rejects_box_outside_image(crop):
+    with pytest.raises(ServiceValidationError):
+        imaging.crop_pixels(crop, 640, 480)
+
+
+def test_prepare_image_applies_exif_orientation():
+    # Stored landscape, displayed portrait
+    data = jpeg(400, 200, orientation=6)
+    assert size_of(imaging.prepare_image(data, 100, 85)) == (50, 100)
+    # Crop boxes refer to the upright image: the top half of 200x400
+    assert size_of(imaging.prepare_image(data, 0, 85, (0, 0, 1, 0.5))) == (200, 200)
+
+
+def test_prepare_image_keeps_small_image():
+    data = jpeg(64, 48)
+    assert imaging.prepare_image(data, 100, 85) is data
+
+
+def test_prepare_image_rejects_box_outside_image():
+    with pytest.raises(ServiceValidationError):
+        imaging.prepare_image(jpeg(64, 48), 0, 85, (100, 100, 200, 200))
+
+
+def test_read_image_file(tmp_path):
+    path = tmp_path / "frame.jpg"
+    path.write_bytes(b"x" * 100)
+    assert imaging.read_image_file(str(path), 100) == b"x" * 100
+    assert imaging.read_image_file(str(path), 0) == b"x" * 100
+    with pytest.raises(ValueError, match="more than the limit of 99"):
+        imaging.read_image_file(str(path), 99)
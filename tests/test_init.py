@@ -0,0 +1,44 @@
+"""Tests of the helpers of the integration's package module."""
+from datetime import time
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.ollama_vision import _within_hours  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    ("now", "expected"),
+    [
+        (time(7, 59), False),
+        (time(8, 0), True),
+        (time(12, 30), True),
+        (time(21, 59, 59), True),
+        (time(22, 0), False),
+        (time(23, 0), False),
+    ],
+)
+def test_within_daytime_window(now, expected):
+    assert _within_hours("08:00-22:00", now) is expected
+
+
+@pytest.mark.parametrize(
+    ("now", "expected"),
+    [
+        (time(21, 59), False),
+        (time(22, 0), True),
+        (time(23, 59, 59), True),
+        (time(0, 0), True),
+        (time(5, 59), True),
+        (time(6, 0), False),
+        (time(12, 0), False),
+    ],
+)
+def test_within_window_crossing_midnight(now, expected):
+    assert _within_hours("22:00 - 06:00", now) is expected
+
+
+@pytest.mark.parametrize("hours", ["", None, "always", "08:00", "8-", "25:00-06:00"])
+def test_empty_or_invalid_window_means_always(hours):
+    assert _within_hours(hours, time(3, 0)) is True
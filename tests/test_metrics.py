@@ -0,0 +1,78 @@
+"""Tests of the pipeline metrics helpers."""
+import pytest
+
+from conftest import FakeClock, load_integration_module
+
+metrics = load_integration_module("metrics")
+
+
+@pytest.mark.parametrize(
+    ("fraction", "expected"),
+    [(0.0, 1), (0.1, 1), (0.5, 5), (0.95, 10), (0.99, 10), (1.0, 10)],
+)
+def test_percentile_nearest_rank(fraction, expected):
+    assert metrics.percentile(list(range(1, 11)), fraction) == expected
+
+
+def test_percentile_of_few_values():
+    assert metrics.percentile([], 0.5) is None
+    assert metrics.percentile([3.0], 0.99) == 3.0
+    assert metrics.percentile([1.0, 2.0], 0.5) == 1.0
+    assert metrics.percentile([1.0, 2.0], 0.51) == 2.0
+
+
+def test_merge_ollama_stats_sums_counts_and_keeps_slowest_durations():
+    merged = metrics.merge_ollama_stats([
+        {
+            "total_duration": 2_000, "load_duration": 100, "prompt_eval_duration": 500,
+            "eval_duration": 1_400, "prompt_eval_count": 300, "eval_count": 40,
+            "done_reason": "stop",
+        },
+        {
+            "total_duration": 3_000, "load_duration": 50, "prompt_eval_duration": 900,
+            "eval_duration": 2_050, "prompt_eval_count": 320, "eval_count": 60,
+        },
+    ])
+    assert merged == {
+        "total_duration": 3_000,
+        "load_duration": 50,
+        "prompt_eval_duration": 900,
+        "eval_duration": 2_050,
+        "prompt_eval_count": 620,
+        "eval_count": 100,
+    }
+
+
+def test_merge_ollama_stats_with_missing_stats():
+    assert metrics.merge_ollama_stats([]) == {}
+    assert metrics.merge_ollama_stats([{}, {"eval_count": 5}]) == {"eval_count": 5}
+    # A cached call reports nothing but its flag
+    assert metrics.merge_ollama_stats([{"cached": True}, {"eval_count": 7, "total_duration": 10}]) == {
+        "eval_count": 7, "total_duration": 10,
+    }
+
+
+def test_ollama_timings():
+    assert metrics.ollama_timings("vision", {
+        "load_duration": 500_000_000, "prompt_eval_duration": 250_000_000, "eval_duration": 2_000_000_000,
+    }) == {"vision_load": 0.5, "vision_prompt_eval": 0.25, "vision_generation": 2.0}
+
+
+def test_pipeline_metrics(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics, "time", clock)
+    pipeline = metrics.PipelineMetrics()
+    for total in (1.0, 2.0, 3.0, 4.0):
+        pipeline.record(
+            {"vision": total / 2, "total": total},
+            vision_stats={"eval_count": 20, "eval_duration": 1_000_000_000},
+        )
+    pipeline.record_error(RuntimeError("boom"))
+    assert pipeline.total_percentile(0.5) == 2.0
+    assert pipeline.stage_percentiles()["vision"] == {"p50": 1.0, "p95": 2.0, "p99": 2.0}
+    assert pipeline.tokens_per_second("vision") == 20.0
+    assert pipeline.tokens_per_second("text") is None
+    assert (pipeline.requests, pipeline.errors, pipeline.last_error) == (5, 1, "boom")
+    assert pipeline.requests_per_minute() == 4
+    clock.now += 61
+    assert pipeline.requests_per_minute() == 0
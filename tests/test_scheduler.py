@@ -0,0 +1,160 @@
+"""Tests of the per-entry analysis scheduler."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from conftest import load_integration_module  # noqa: E402
+
+scheduler_module = load_integration_module("scheduler")
+AnalysisDropped = scheduler_module.AnalysisDropped
+AnalysisScheduler = scheduler_module.AnalysisScheduler
+
+
+class FakeHass:
+    """The parts of HomeAssistant the scheduler uses."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+
+    def async_create_task(self, coro):
+        return self.loop.create_task(coro)
+
+
+def job(result, gate=None, started=None):
+    async def run():
+        if started is not None:
+            started.append(result)
+        if gate is not None:
+            await gate.wait()
+        return result
+    return run
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def run(test):
+    """Run an async test body with a scheduler for one job at a time."""
+    async def main():
+        return await test(AnalysisScheduler(FakeHass(), max_in_flight=1, max_queue=2))
+    asyncio.run(main())
+
+
+def test_runs_at_most_max_in_flight():
+    async def test(scheduler):
+        gate = asyncio.Event()
+        started = []
+        first = scheduler.async_submit("a", job("A", gate, started))
+        second = scheduler.async_submit("b", job("B", gate, started))
+        await settle()
+        assert started == ["A"]
+        assert scheduler.in_flight == 1
+        assert scheduler.queue_depth == 1
+        gate.set()
+        assert await first == "A"
+        assert await second == "B"
+        assert scheduler.stats["in_flight"] == 0
+    run(test)
+
+
+def test_newer_request_replaces_queued_one():
+    async def test(scheduler):
+        gate = asyncio.Event()
+        started = []
+        blocker = scheduler.async_submit("busy", job("busy", gate, started))
+        stale = scheduler.async_submit("cam", job("old frame", started=started))
+        newer = scheduler.async_submit("cam", job("new frame", started=started))
+        assert scheduler.queue_depth == 1
+        gate.set()
+        assert await blocker == "busy"
+        assert await newer == "new frame"
+        assert await stale == "new frame"
+        assert started == ["busy", "new frame"]
+        assert scheduler.replaced == 1
+    run(test)
+
+
+def test_full_queue_drops_oldest():
+    async def test(scheduler):
+        gate = asyncio.Event()
+        blocker = scheduler.async_submit("busy", job("busy", gate))
+        oldest = scheduler.async_submit("a", job("A"))
+        second = scheduler.async_submit("b", job("B"))
+        newest = scheduler.async_submit("c", job("C"))
+        with pytest.raises(AnalysisDropped):
+            await oldest
+        assert scheduler.dropped == 1
+        assert scheduler.queue_depth == 2
+        gate.set()
+        assert [await blocker, await second, await newest] == ["busy", "B", "C"]
+    run(test)
+
+
+def test_withdrawn_queued_request_leaves_queue():
+    async def test(scheduler):
+        gate = asyncio.Event()
+        started = []
+        blocker = scheduler.async_submit("busy", job("busy", gate, started))
+        queued = scheduler.async_submit("cam", job("frame", started=started))
+        queued.cancel()
+        await settle()
+        assert scheduler.queue_depth == 0
+        gate.set()
+        assert await blocker == "busy"
+        await settle()
+        assert started == ["busy"]
+    run(test)
+
+
+def test_withdrawn_replacement_restores_queued_request():
+    async def test(scheduler):
+        gate = asyncio.Event()
+        started = []
+        blocker = scheduler.async_submit("busy", job("busy", gate, started))
+        stale = scheduler.async_submit("cam", job("old frame", started=started))
+        newer = scheduler.async_submit("cam", job("new frame", started=started))
+        newer.cancel()
+        await settle()
+        assert scheduler.queue_depth == 1
+        gate.set()
+        assert await blocker == "busy"
+        assert await stale == "old frame"
+        assert started == ["busy", "old frame"]
+    run(test)
+
+
+def test_withdrawn_running_replacement_requeues_replaced_request():
+    async def test(scheduler):
+        gate = asyncio.Event()
+        started = []
+        blocker = scheduler.async_submit("busy", job("busy", gate, started))
+        stale = scheduler.async_submit("cam", job("old frame", started=started))
+        newer = scheduler.async_submit("cam", job("new frame", asyncio.Event(), started))
+        gate.set()
+        assert await blocker == "busy"
+        await settle()
+        assert started == ["busy", "new frame"]
+        newer.cancel()
+        assert await stale == "old frame"
+        assert started == ["busy", "new frame", "old frame"]
+    run(test)
+
+
+def test_shutdown_cancels_queued_and_running_requests():
+    async def test(scheduler):
+        running = scheduler.async_submit("busy", job("busy", asyncio.Event()))
+        stale = scheduler.async_submit("cam", job("old frame"))
+        newer = scheduler.async_submit("cam", job("new frame"))
+        await settle()
+        scheduler.async_shutdown()
+        await settle()
+        assert running.cancelled()
+        assert newer.cancelled()
+        assert stale.cancelled()
+        assert scheduler.queue_depth == 0
+        assert scheduler.in_flight == 0
+    run(test)